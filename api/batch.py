@@ -0,0 +1,157 @@
+# api/batch.py
+"""
+Bulk pricing: request schemas and JSON / CSV parsing for
+POST /predict/batch and POST /vehicles/predict.
+
+Both end in one vectorized predict call over a DataFrame of raw vehicle
+columns, never a per-record model.predict.
+"""
+import io
+import os
+from typing import List, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+from pydantic import BaseModel, Field, ValidationError
+
+from ml.features import RAW_FIELDS, REQUIRED_FIELDS
+
+PREDICT_BATCH_MAX = int(os.getenv("PREDICT_BATCH_MAX", "10000"))
+# Request bodies larger than this are refused before being read in full
+PREDICT_BODY_MAX_BYTES = int(os.getenv("PREDICT_BODY_MAX_BYTES", str(16 * 1024 * 1024)))
+# Rows predicted per NDJSON chunk when streaming
+PREDICT_STREAM_CHUNK = int(os.getenv("PREDICT_STREAM_CHUNK", "1000"))
+
+YEAR_RANGE = (1990, 2100)
+
+
+class VehicleSpec(BaseModel):
+    id: Optional[str] = None
+    year: int = Field(..., ge=YEAR_RANGE[0], le=YEAR_RANGE[1])
+    mileage_km: int = Field(..., ge=0)
+    title: Optional[str] = None
+    trim: Optional[str] = None
+
+
+# Lists are bounded in the schema so an oversized one is rejected before validating it all
+class BatchPredictRequest(BaseModel):
+    vehicles: List[VehicleSpec] = Field(..., max_length=PREDICT_BATCH_MAX)
+
+
+class VinPredictRequest(BaseModel):
+    vins: List[str] = Field(..., max_length=PREDICT_BATCH_MAX)
+
+
+class BatchError(ValueError):
+    """Input rejected as a whole; `errors` points at the offending rows."""
+
+    def __init__(self, message: str, errors=None, status_code: int = 422):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status_code = status_code
+
+
+async def read_body(request, limit: int = PREDICT_BODY_MAX_BYTES) -> bytes:
+    """The request body, refused (413) once it is known to exceed `limit` bytes."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise BatchError(f"Request body exceeds {limit} bytes", status_code=413)
+
+    # Chunked uploads carry no Content-Length: count while reading
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise BatchError(f"Request body exceeds {limit} bytes", status_code=413)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def frame_from_json(body: bytes) -> pd.DataFrame:
+    """Validate {"vehicles": [...]} with Pydantic and build the raw columns."""
+    try:
+        request = BatchPredictRequest.model_validate_json(body)
+    except ValidationError as e:
+        if any(err["type"] == "too_long" and err["loc"] == ("vehicles",) for err in e.errors()):
+            raise BatchError(
+                f"Batch exceeds the limit of {PREDICT_BATCH_MAX} vehicles", status_code=413
+            )
+        raise
+    return pd.DataFrame.from_records(
+        [v.model_dump() for v in request.vehicles],
+        columns=["id", *RAW_FIELDS]
+    )
+
+
+def frame_from_csv(body: bytes) -> pd.DataFrame:
+    """
+    Parse a CSV upload (header row, `year` and `mileage_km` required) and
+    validate it column-wise instead of one model instance per row.
+    """
+    try:
+        frame = pd.read_csv(
+            io.BytesIO(body),
+            dtype={"id": str, "title": str, "trim": str},
+            keep_default_na=False, na_values=[""],
+            # One row past the limit is enough for check_size() to refuse it
+            nrows=PREDICT_BATCH_MAX + 1
+        )
+    except (ValueError, pd.errors.ParserError) as e:
+        raise BatchError(f"Unreadable CSV: {e}")
+
+    missing = [c for c in REQUIRED_FIELDS if c not in frame.columns]
+    if missing:
+        raise BatchError(f"CSV is missing columns: {missing}")
+
+    for col in ("id", "title", "trim"):
+        if col not in frame.columns:
+            frame[col] = None
+
+    year = pd.to_numeric(frame["year"], errors="coerce")
+    mileage = pd.to_numeric(frame["mileage_km"], errors="coerce")
+    bad = (
+        year.isna() | ~year.between(*YEAR_RANGE)
+        | mileage.isna() | (mileage < 0)
+    ).to_numpy()
+    if bad.any():
+        rows = (np.flatnonzero(bad)[:20] + 2).tolist()  # 1-based, after the header
+        raise BatchError(
+            f"{int(bad.sum())} rows have an invalid year / mileage_km",
+            [{"line": r} for r in rows]
+        )
+
+    return frame[["id", *RAW_FIELDS]].assign(
+        year=year.astype(int), mileage_km=mileage.astype(int)
+    )
+
+
+def check_size(n: int, limit: int = PREDICT_BATCH_MAX):
+    if n > limit:
+        raise BatchError(f"Batch of {n} exceeds the limit of {limit} vehicles", status_code=413)
+
+
+def price_list(preds: np.ndarray) -> list:
+    """Predictions as JSON-ready floats, NaN -> None."""
+    out = preds.astype(object)
+    out[np.isnan(preds)] = None
+    return out.tolist()
+
+
+async def stream_predictions(frame: pd.DataFrame, version, predict_chunk,
+                             chunk: int = PREDICT_STREAM_CHUNK):
+    """
+    NDJSON: a header line, then one line per vehicle, produced chunk by
+    chunk so the first rows go out before the last are predicted.
+    `predict_chunk` is an async callable frame -> predictions.
+    """
+    yield orjson.dumps({"model_version": version, "count": len(frame)}) + b"\n"
+
+    ids = frame["id"].to_numpy(dtype=object)
+    for start in range(0, len(frame), chunk):
+        part = frame.iloc[start:start + chunk]
+        preds = price_list(await predict_chunk(part))
+        yield b"".join(
+            orjson.dumps({"index": start + i, "id": ids[start + i], "predicted_price": p}) + b"\n"
+            for i, p in enumerate(preds)
+        )
@@ -0,0 +1,196 @@
+# api/cache.py
+"""
+Response cache for the read-heavy endpoints (/vehicles, /report).
+
+Their payload only changes when a pipeline run completes, so responses
+are cached under the newest report snapshot (written as the run's last
+step), the latest sync timestamp and the served model version. The ETag
+is derived from that key alone: a client polling with If-None-Match
+gets a 304 without the body being built or even read.
+
+A body built mid-run (sync logged, predictions not yet refreshed) still
+carries the previous snapshot in its key, so it is superseded as soon
+as the run finishes, on every worker and for cron-triggered runs too.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+from fastapi import Response
+
+from db.mongo import sync_logs_async_col, report_snapshots_async_col
+from ml.predict import get_model_version
+
+# memory | redis | off
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "64"))
+# Clients may reuse a response this long without revalidating
+CACHE_MAX_AGE_S = int(os.getenv("CACHE_MAX_AGE_S", "0"))
+# How long the (snapshot, sync timestamp, model version) lookup itself is reused
+CACHE_VERSION_TTL_S = float(os.getenv("CACHE_VERSION_TTL_S", "5"))
+
+KEY_PREFIX = "resp:"
+
+
+def _served_version():
+    try:
+        return get_model_version()
+    except FileNotFoundError:
+        return None
+
+
+class MemoryBackend:
+    """LRU of serialized bodies, private to this process."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Shared by every uvicorn worker; entries expire after a day. Calls
+    block, which is fine for a Redis on the same host (sub-millisecond).
+    """
+
+    def __init__(self, url: str = CACHE_REDIS_URL, ttl_s: int = 86400):
+        import redis  # optional: only needed with CACHE_BACKEND=redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl_s = ttl_s
+
+    def get(self, key: str):
+        return self._redis.get(KEY_PREFIX + key)
+
+    def set(self, key: str, body: bytes):
+        self._redis.set(KEY_PREFIX + key, body, ex=self.ttl_s)
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(KEY_PREFIX + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for _ in self._redis.scan_iter(KEY_PREFIX + "*"))
+
+
+def make_backend(kind: str = CACHE_BACKEND):
+    if kind == "off":
+        return None
+    if kind == "redis":
+        return RedisBackend()
+    return MemoryBackend()
+
+
+class ResponseCache:
+
+    def __init__(self, backend=None, version_ttl_s: float = CACHE_VERSION_TTL_S,
+                 max_age_s: int = CACHE_MAX_AGE_S):
+        self.backend = backend
+        self.version_ttl_s = version_ttl_s
+        self.max_age_s = max_age_s
+
+        self._version = None
+        self._version_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def data_version(self) -> str:
+        """
+        "<newest snapshot>|<latest sync>|<served model version>", briefly
+        memoized. The snapshot marks the end of a pipeline run.
+        """
+        now = time.monotonic()
+        version = self._version
+        if version is not None and now - self._version_at < self.version_ttl_s:
+            return version
+
+        snapshot = await report_snapshots_async_col.find_one(
+            {}, {"_id": 0, "created_at": 1}, sort=[("created_at", -1)]
+        )
+        log = await sync_logs_async_col.find_one(
+            {}, {"_id": 0, "timestamp": 1}, sort=[("timestamp", -1)]
+        )
+        # May (re)load the model: keep it off the event loop
+        model_version = await asyncio.to_thread(_served_version)
+
+        finished = snapshot["created_at"].isoformat() if snapshot else None
+        synced = log["timestamp"].isoformat() if log and log.get("timestamp") else None
+        version = f"{finished}|{synced}|{model_version}"
+        self._version, self._version_at = version, now
+        return version
+
+    def invalidate(self):
+        """Called when a sync / training finished in this process's job runner."""
+        self._version = None
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "data_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
+
+    async def respond(self, request, name: str, build, **params) -> Response:
+        """
+        Serve `await build()` as JSON through the cache; it returns a payload
+        or an already encoded body. `params` are whatever changes the payload.
+        """
+        key = f"{name}:{json.dumps(params, sort_keys=True, default=str)}:{await self.data_version()}"
+        etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age_s}, must-revalidate"
+        }
+
+        if etag in request.headers.get("if-none-match", ""):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        body = self.backend.get(key) if self.backend is not None else None
+        if body is None:
+            self.misses += 1
+            body = await build()
+            if not isinstance(body, bytes):
+                # Datetimes and NumPy scalars are encoded by orjson directly
+                body = orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+            if self.backend is not None:
+                self.backend.set(key, body)
+        else:
+            self.hits += 1
+
+        return Response(content=body, media_type="application/json", headers=headers)
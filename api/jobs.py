@@ -0,0 +1,237 @@
+# api/jobs.py
+"""
+Pipeline jobs (scrape -> sync -> train) run outside the web process.
+
+The API submits jobs to a single long-lived worker process, so Chromium
+and the forest fit never compete with request handling. The worker keeps
+its own BrowserPool between runs. A lock document in Mongo makes sure two
+triggers (API, cron, another uvicorn worker) never run concurrently.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from db.mongo import jobs_col, locks_col
+
+LOCK_ID = "pipeline"
+# A crashed worker cannot release the lock; it expires after this long
+JOB_LOCK_TTL_S = int(os.getenv("JOB_LOCK_TTL_S", "7200"))
+
+# Worker-process state, created by _init_worker
+_worker_loop = None
+_worker_browser_pool = None
+
+
+# -------------------------------------------------
+# Lock + job documents
+# -------------------------------------------------
+
+def acquire_lock(job_id: str) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        # Matches only a free or expired lock; otherwise the upsert collides on _id
+        locks_col.find_one_and_update(
+            {"_id": LOCK_ID, "$or": [{"job_id": None}, {"expires_at": {"$lt": now}}]},
+            {"$set": {
+                "job_id": job_id,
+                "expires_at": now + timedelta(seconds=JOB_LOCK_TTL_S)
+            }},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def release_lock(job_id: str):
+    locks_col.update_one(
+        {"_id": LOCK_ID, "job_id": job_id},
+        {"$set": {"job_id": None, "expires_at": None}}
+    )
+
+
+def running_job_id():
+    lock = locks_col.find_one({"_id": LOCK_ID})
+    return lock.get("job_id") if lock else None
+
+
+def create_job(trigger: str, force_retrain: bool = False):
+    """Take the pipeline lock and record a queued job; None if one is running."""
+    job_id = uuid.uuid4().hex
+    if not acquire_lock(job_id):
+        return None
+
+    jobs_col.insert_one({
+        "_id": job_id,
+        "trigger": trigger,
+        "force_retrain": force_retrain,
+        "status": "queued",
+        "created_at": datetime.now(timezone.utc),
+        "stages": {}
+    })
+    return job_id
+
+
+def get_job(job_id: str):
+    return jobs_col.find_one({"_id": job_id})
+
+
+def _set_stage(job_id: str, stage: str, ms: float, **extra):
+    jobs_col.update_one(
+        {"_id": job_id},
+        {"$set": {f"stages.{stage}": {"ms": round(ms, 1), **extra}}}
+    )
+
+
+def fail_job(job_id: str, error: str):
+    jobs_col.update_one(
+        {"_id": job_id},
+        {"$set": {
+            "status": "failed",
+            "error": error,
+            "finished_at": datetime.now(timezone.utc)
+        }}
+    )
+    release_lock(job_id)
+
+
+# -------------------------------------------------
+# Job body (runs in the worker process, or inline for cron)
+# -------------------------------------------------
+
+def _init_worker():
+    global _worker_loop, _worker_browser_pool
+    from scraper.browser_pool import BrowserPool
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_browser_pool = BrowserPool()
+    _worker_loop.run_until_complete(_worker_browser_pool.start())
+
+
+def run_pipeline_job(job_id: str, force_retrain: bool = False):
+    from sync.sync_engine import run_sync
+    from ml.train import maybe_train_model
+    from api.report import publish_report_snapshot
+
+    jobs_col.update_one(
+        {"_id": job_id},
+        {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}}
+    )
+
+    try:
+        start = time.perf_counter()
+        sync_coro = run_sync(browser_pool=_worker_browser_pool)
+        if _worker_loop is not None:
+            counts = _worker_loop.run_until_complete(sync_coro)
+        else:
+            counts = asyncio.run(sync_coro)
+        sync_ms = (time.perf_counter() - start) * 1000
+
+        scrape_ms = counts.pop("scrape_ms", None) or 0
+        enrich_ms = counts.pop("enrich_ms", None) or 0
+        _set_stage(job_id, "scrape", scrape_ms)
+        _set_stage(job_id, "enrich", enrich_ms)
+        _set_stage(job_id, "sync", sync_ms - scrape_ms - enrich_ms, **counts)
+
+        # Skipped (version None) when the data did not change enough
+        start = time.perf_counter()
+        version = maybe_train_model(counts, force=force_retrain)
+        _set_stage(job_id, "train", (time.perf_counter() - start) * 1000,
+                   model_version=version, skipped=version is None)
+
+        # /report serves this until the next run
+        start = time.perf_counter()
+        snapshot = publish_report_snapshot(job_id)
+        _set_stage(job_id, "report", (time.perf_counter() - start) * 1000,
+                   total_active=snapshot["total_active"], body_bytes=snapshot["body_bytes"])
+
+        jobs_col.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc)}}
+        )
+        release_lock(job_id)
+    except Exception:
+        fail_job(job_id, traceback.format_exc())
+        raise
+
+
+# -------------------------------------------------
+# API-side runner
+# -------------------------------------------------
+
+class JobRunner:
+    """Owns the worker process; started and stopped by the API lifespan."""
+
+    def __init__(self, on_finished=None):
+        self._executor = None
+        self.submitted = 0
+        # Called with the job id after every run, e.g. to drop cached responses
+        self.on_finished = on_finished
+        # Strong references to the failure handlers still running
+        self._pending = set()
+
+    def start(self):
+        # spawn: the worker must not inherit the API's Mongo clients / loop
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._executor is not None,
+            "submitted": self.submitted,
+            "current_job": running_job_id()
+        }
+
+    async def submit(self, trigger: str = "api", force_retrain: bool = False):
+        """Queue a pipeline run; returns its job id, or None if one is running."""
+        job_id = await asyncio.to_thread(create_job, trigger, force_retrain)
+        if job_id is None:
+            return None
+
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, run_pipeline_job, job_id, force_retrain
+        )
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        self.submitted += 1
+        return job_id
+
+    def _on_done(self, job_id: str, future):
+        """Runs on the API event loop: no blocking Mongo calls here."""
+        if self.on_finished is not None:
+            self.on_finished(job_id)
+
+        # Cancelled by stop() at shutdown; the lock expires after JOB_LOCK_TTL_S
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            return
+
+        print(f"⚠️ Pipeline job {job_id} failed: {error!r}")
+        task = asyncio.ensure_future(self._handle_failure(job_id, error))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _handle_failure(self, job_id: str, error: BaseException):
+        # Job failures are recorded by the worker; a dead worker is not
+        job = await asyncio.to_thread(get_job, job_id)
+        if job and job["status"] in ("queued", "running"):
+            await asyncio.to_thread(fail_job, job_id, repr(error))
+            self.stop()
+            self.start()
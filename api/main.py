@@ -92,66 +92,178 @@
 #     background_tasks.add_task(run_pipeline)
 #     return {"status": "sync + training started"}
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException
-from db.mongo import vehicles_col, sync_logs_col, ml_metrics_col
-from ml.predict import predict_price
-from ml.train import train_model
-from sync.sync_engine import run_sync
-from datetime import datetime
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from db.mongo import (
+    vehicles_read_col,
+    sync_logs_read_col,
+    ml_metrics_read_col,
+    vehicle_history_read_col,
+    vehicles_async_col,
+    sync_logs_async_col,
+    get_client,
+    get_async_client,
+    close_clients,
+    close_async_clients,
+    pool_stats,
+)
+from db.indexes import ensure_indexes
+from ml.features import RAW_FIELDS
+from ml.predict import (
+    FEATURES,
+    predict_frame,
+    cached_or_live_prices,
+    served_model,
+)
+from api.jobs import JobRunner, get_job
+from api.cache import ResponseCache, make_backend
+from api.batch import (
+    BatchError,
+    VinPredictRequest,
+    check_size,
+    frame_from_csv,
+    frame_from_json,
+    price_list,
+    read_body,
+    stream_predictions,
+)
+from api.report import build_report, latest_snapshot_at, snapshot_body
+from api.pagination import (
+    MAX_PAGE_SIZE,
+    read_page,
+    sort_spec,
+    stream_ndjson,
+    vehicles_filter,
+    vehicles_projection,
+)
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Literal, Optional
 import asyncio
+import math
+import os
 
-app = FastAPI(title="Audi Used Car Inventory API")
+# Threads for model inference / report building, kept off the event loop
+API_INFERENCE_WORKERS = int(os.getenv("API_INFERENCE_WORKERS", "4"))
 
-# -------------------------------------------------
-# Background pipeline
-# -------------------------------------------------
+MODEL_NOT_TRAINED = "Model not trained yet. Please run /trigger-sync first."
+
+inference_executor = None
+response_cache = ResponseCache(make_backend())
+# A finished pipeline run means new data / a new model: drop cached responses
+job_runner = JobRunner(on_finished=lambda job_id: response_cache.invalidate())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global inference_executor
 
-async def async_pipeline():
-    await run_sync()
+    get_client()
+    get_client("read")
+    # Bound to this loop: the async endpoints share it
+    get_async_client("read")
+    get_async_client("default")
+    await asyncio.to_thread(ensure_indexes)
+    inference_executor = ThreadPoolExecutor(
+        max_workers=API_INFERENCE_WORKERS, thread_name_prefix="inference"
+    )
+    job_runner.start()
+    yield
+    job_runner.stop()
+    inference_executor.shutdown(wait=False, cancel_futures=True)
+    await close_async_clients()
+    close_clients()
+
+
+async def run_in_inference(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, fn, *args)
 
-def run_pipeline():
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(async_pipeline())
-    train_model()
+
+# orjson encodes datetimes itself: no per-row isoformat() before responding
+app = FastAPI(
+    title="Audi Used Car Inventory API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # -------------------------------------------------
 # API Endpoints
 # -------------------------------------------------
 
 @app.get("/vehicles")
-def get_vehicles():
-    vehicles = list(
-        vehicles_col.find({"status": "active"}, {"_id": 0})
+async def get_vehicles(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    sort: Literal["vin", "price"] = "vin",
+    fields: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    price_min: Optional[int] = None,
+    price_max: Optional[int] = None,
+    mileage_min: Optional[int] = None,
+    mileage_max: Optional[int] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    """
+    Active vehicles. Without `limit`: every match as one list. With it:
+    {"items", "count", "next_cursor"}; pass next_cursor as `after`.
+    format=ndjson streams one vehicle per line straight off the cursor.
+    """
+    ranges = {
+        "year": (year_min, year_max),
+        "price": (price_min, price_max),
+        "mileage": (mileage_min, mileage_max),
+    }
+    try:
+        query = vehicles_filter(ranges, sort, after)
+        projection = vehicles_projection(fields, sort)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(vehicles_async_col, query, projection, sort, limit),
+            media_type="application/x-ndjson"
+        )
+
+    return await response_cache.respond(
+        request, "vehicles",
+        partial(_build_vehicles, query, projection, sort, limit),
+        query=query, projection=projection, sort=sort, limit=limit
     )
 
-    # Convert datetime fields to ISO
-    for v in vehicles:
-        if v.get("date_scraped"):
-            v["date_scraped"] = v["date_scraped"].isoformat()
-        if v.get("last_seen"):
-            v["last_seen"] = v["last_seen"].isoformat()
 
-    return vehicles
+async def _build_vehicles(query: dict, projection: dict, sort: str, limit: Optional[int]):
+    if limit is not None:
+        return await read_page(vehicles_async_col, query, projection, sort, limit)
+
+    return await vehicles_async_col.find(query, projection).sort(sort_spec(sort)).to_list(None)
 
 
 @app.get("/vehicles/{vin}/predict")
-def get_prediction(vin: str):
-    vehicle = vehicles_col.find_one({"vin": vin})
+async def get_prediction(vin: str):
+    vehicle = await vehicles_async_col.find_one({"vin": vin})
 
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     try:
-        predicted_price = predict_price(vehicle)
+        # A version check may reload the model; predict is CPU-bound
+        predicted_price = (await run_in_inference(cached_or_live_prices, [vehicle]))[0]
     except FileNotFoundError:
-        raise HTTPException(
-            status_code=503,
-            detail="Model not trained yet. Please run /trigger-sync first."
-        )
+        raise HTTPException(status_code=503, detail=MODEL_NOT_TRAINED)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if math.isnan(predicted_price):
+        raise HTTPException(status_code=422, detail=f"Missing features for prediction: {FEATURES}")
+    predicted_price = float(predicted_price)
+
     return {
         "vin": vin,
         "actual_price": vehicle["price"],
@@ -160,9 +272,131 @@ def get_prediction(vin: str):
     }
 
 
+@app.post("/predict/batch")
+async def predict_batch(request: Request, stream: bool = False):
+    """
+    Price arbitrary vehicles: {"vehicles": [{"year", "mileage_km", "title"?,
+    "trim"?, "id"?}, ...]} as JSON, or the same columns as a CSV upload
+    (Content-Type: text/csv). predictions[i] belongs to vehicles[i];
+    stream=true answers in NDJSON as chunks are predicted.
+    """
+    try:
+        body = await read_body(request)
+        # Parsing / validating up to PREDICT_BATCH_MAX rows is CPU work
+        parse = frame_from_csv if "csv" in request.headers.get("content-type", "") else frame_from_json
+        frame = await run_in_inference(parse, body)
+        check_size(len(frame))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except BatchError as e:
+        raise HTTPException(
+            status_code=e.status_code, detail={"message": str(e), "errors": e.errors}
+        )
+
+    try:
+        # One state read: every row (and chunk) priced by the same model
+        model, version, encoder = await run_in_inference(served_model)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail=MODEL_NOT_TRAINED)
+
+    if stream:
+        return StreamingResponse(
+            stream_predictions(
+                frame, version,
+                lambda part: run_in_inference(predict_frame, part, model, encoder)
+            ),
+            media_type="application/x-ndjson"
+        )
+
+    preds = await run_in_inference(predict_frame, frame, model, encoder)
+    ids = frame["id"]
+    return {
+        "model_version": version,
+        "count": len(frame),
+        "ids": ids.tolist() if ids.notna().any() else None,
+        "predictions": price_list(preds)
+    }
+
+
+@app.post("/vehicles/predict")
+async def predict_vins(body: VinPredictRequest):
+    """Stored-or-live predictions for known VINs, resolved with one $in query."""
+    vins = list(dict.fromkeys(body.vins))
+    try:
+        check_size(len(vins))
+    except BatchError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    vehicles = await vehicles_async_col.find(
+        {"vin": {"$in": vins}},
+        {"_id": 0, "vin": 1, "price": 1, "predicted_price": 1, "model_version": 1,
+         **{f: 1 for f in RAW_FIELDS}}
+    ).to_list(None)
+
+    try:
+        preds = await run_in_inference(cached_or_live_prices, vehicles)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail=MODEL_NOT_TRAINED)
+
+    found = {}
+    for v, predicted in zip(vehicles, price_list(preds)):
+        price = v.get("price")
+        found[v["vin"]] = {
+            "vin": v["vin"],
+            "actual_price": price,
+            "predicted_price": predicted,
+            "difference": predicted - price if predicted is not None and price is not None else None
+        }
+
+    return {
+        "predictions": [found[vin] for vin in vins if vin in found],
+        "not_found": [vin for vin in vins if vin not in found]
+    }
+
+
+@app.get("/vehicles/{vin}/history")
+def get_history(vin: str, limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE)):
+    # Served by the {vin, ts} index; limit=0 would mean no limit to Mongo
+    points = list(
+        vehicle_history_read_col.find({"vin": vin}, {"_id": 0})
+        .sort("ts", -1)
+        .limit(limit)
+    )
+
+    if not points:
+        raise HTTPException(status_code=404, detail="No history for this vehicle")
+
+    for p in points:
+        p["ts"] = p["ts"].isoformat()
+
+    return {"vin": vin, "history": points}
+
+
+@app.get("/price-drops")
+def price_drops(since: Optional[datetime] = None,
+                limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+    # Served by the {price_dropped, ts} index
+    if since is None:
+        since = datetime.now(timezone.utc) - timedelta(days=7)
+
+    drops = list(
+        vehicle_history_read_col.find(
+            {"price_dropped": True, "ts": {"$gte": since}},
+            {"_id": 0}
+        )
+        .sort("ts", -1)
+        .limit(limit)
+    )
+
+    for d in drops:
+        d["ts"] = d["ts"].isoformat()
+
+    return {"since": since.isoformat(), "count": len(drops), "price_drops": drops}
+
+
 @app.get("/sync-status")
-def sync_status():
-    log = sync_logs_col.find_one(sort=[("timestamp", -1)])
+async def sync_status():
+    log = await sync_logs_async_col.find_one(sort=[("timestamp", -1)])
 
     if not log:
         return {
@@ -170,6 +404,7 @@ def sync_status():
             "last_sync": None,
             "new_added": 0,
             "updated": 0,
+            "unchanged": 0,
             "removed": 0,
             "total_active": 0
         }
@@ -178,101 +413,79 @@ def sync_status():
         "last_sync": log.get("timestamp").isoformat() if log.get("timestamp") else None,
         "new_added": log.get("new_count", 0),
         "updated": log.get("updated_count", 0),
+        "unchanged": log.get("unchanged_count", 0),
         "removed": log.get("removed_count", 0),
         "total_active": log.get("total_active", 0)
     }
 
 
+@app.get("/health")
+def health():
+    return {
+        "jobs": job_runner.stats(),
+        "response_cache": response_cache.stats(),
+        "mongo_pools": pool_stats()
+    }
+
+
 @app.post("/trigger-sync")
-def trigger_sync(background_tasks: BackgroundTasks):
-    background_tasks.add_task(run_pipeline)
-    return {"status": "sync + training started"}
+async def trigger_sync(force_retrain: bool = False):
+    # Training is skipped when the sync barely changed the data, unless forced
+    job_id = await job_runner.submit("api", force_retrain=force_retrain)
 
+    if job_id is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A sync is already running"
+        )
 
-# -------------------------------------------------
-# FINAL REQUIRED: /report Endpoint
-# -------------------------------------------------
+    return {"status": "sync + training started", "job_id": job_id}
 
-@app.get("/report")
-def get_report():
-
-    # 1️⃣ Active Vehicles
-    vehicles_cursor = vehicles_col.find(
-        {"status": "active"},
-        {"_id": 0}
-    ).sort("price", 1)
-
-    vehicles = []
-
-    for v in vehicles_cursor:
-        if v.get("date_scraped"):
-            v["date_scraped"] = v["date_scraped"].isoformat()
-        if v.get("last_seen"):
-            v["last_seen"] = v["last_seen"].isoformat()
-
-        # Add predicted price if model exists
-        try:
-            predicted = predict_price(v)
-            v["predicted_price"] = predicted
-            v["price_difference"] = predicted - v["price"]
-        except:
-            v["predicted_price"] = None
-            v["price_difference"] = None
-
-        vehicles.append(v)
-
-    total_active = len(vehicles)
-
-    # 2️⃣ Latest Sync Info
-    latest_sync = sync_logs_col.find_one(sort=[("timestamp", -1)])
-
-    sync_section = {
-        "Last Sync": latest_sync["timestamp"].isoformat() if latest_sync else None,
-        "New Vehicles Added": latest_sync.get("new_count", 0) if latest_sync else 0,
-        "Vehicles Updated": latest_sync.get("updated_count", 0) if latest_sync else 0,
-        "Vehicles Removed": latest_sync.get("removed_count", 0) if latest_sync else 0,
-        "Total Active": total_active
-    }
 
-    # 3️⃣ Latest ML Metrics
-    latest_ml = ml_metrics_col.find_one(sort=[("timestamp", -1)])
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job(job_id)
 
-    if latest_ml:
-        last_trained = (
-            latest_ml.get("timestamp").isoformat()
-            if latest_ml.get("timestamp")
-            else None
-        )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-        ml_section = {
-            "Model Used": latest_ml.get("model_name"),
-            "Features": latest_ml.get("features", []),
-            "MAE": latest_ml.get("mae"),
-            "RMSE": latest_ml.get("rmse"),
-            "R2 Score": latest_ml.get("r2_score"),
-            "Last Trained": last_trained
-        }
-    else:
-        ml_section = {
-            "Model Used": None,
-            "Features": [],
-            "MAE": None,
-            "RMSE": None,
-            "R2 Score": None,
-            "Last Trained": None
-        }
+    job["job_id"] = job.pop("_id")
+    for key in ("created_at", "started_at", "finished_at"):
+        if job.get(key):
+            job[key] = job[key].isoformat()
 
-    automation_section = {
-        "Trigger": "Every 24 Hours",
-        "Manual Trigger Endpoint": "/trigger-sync",
-        "Status": "Operational"
-    }
+    return job
 
-    return {
-        "Company": "Audi West Island",
-        "Total Vehicles": total_active,
-        "Vehicles": vehicles,
-        "Database Sync": sync_section,
-        "ML Price Prediction": ml_section,
-        "Automation": automation_section
-    }
\ No newline at end of file
+
+# -------------------------------------------------
+# FINAL REQUIRED: /report Endpoint
+# -------------------------------------------------
+
+@app.get("/report")
+async def get_report(request: Request, live: bool = False):
+    """
+    Latest snapshot written by the pipeline (one indexed read), or the
+    report built from the current data with live=true.
+    """
+    if not live:
+        created_at = await latest_snapshot_at()
+        if created_at is not None:
+            return await response_cache.respond(
+                request, "report", partial(_snapshot_or_live, created_at),
+                snapshot=created_at
+            )
+
+    return await response_cache.respond(request, "report-live", _build_report)
+
+
+async def _snapshot_or_live(created_at):
+    # Pruned since its timestamp was read: build the report instead
+    body = await snapshot_body(created_at)
+    return body if body is not None else await _build_report()
+
+
+async def _build_report():
+    # Full scan + batch inference: built on the sync driver in a worker thread
+    return await run_in_inference(
+        build_report, vehicles_read_col, sync_logs_read_col, ml_metrics_read_col
+    )
@@ -0,0 +1,119 @@
+# api/pagination.py
+"""
+Query building for /vehicles: range filters, projection and keyset
+(cursor) pagination over the {status, vin} / {status, price, vin} indexes.
+Reads go through the async client (`col` is an AsyncLazyCollection).
+
+A cursor is the sort key of the last row returned, so each page is one
+index range scan however deep the client pages — no skip().
+"""
+import base64
+import os
+import re
+
+import orjson
+
+MAX_PAGE_SIZE = int(os.getenv("VEHICLES_MAX_PAGE_SIZE", "1000"))
+STREAM_BATCH_SIZE = int(os.getenv("VEHICLES_STREAM_BATCH_SIZE", "500"))
+
+# sort name -> index keys after status (the last one is unique)
+SORT_KEYS = {
+    "vin": ["vin"],
+    "price": ["price", "vin"],
+}
+# query param prefix -> document field
+RANGE_FIELDS = {
+    "year": "year",
+    "price": "price",
+    "mileage": "mileage_km",
+}
+# Dotted paths whose segments start with a letter: no "_id" (an ObjectId
+# orjson cannot encode), no "$" operators
+FIELD_RE = re.compile(r"^[A-Za-z]\w*(\.[A-Za-z]\w*)*$")
+
+
+def encode_cursor(doc: dict, sort: str) -> str:
+    values = [doc.get(k) for k in SORT_KEYS[sort]]
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+
+def decode_cursor(token: str, sort: str) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, orjson.JSONDecodeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(SORT_KEYS[sort]):
+        raise ValueError(f"Cursor does not match sort={sort}")
+    return values
+
+
+def vehicles_filter(ranges: dict, sort: str = "vin", after: str = None) -> dict:
+    """
+    Mongo filter for active vehicles. `ranges` maps a RANGE_FIELDS key to
+    (min, max), either end None; `after` is a cursor from a previous page.
+    """
+    query = {"status": "active"}
+
+    for name, (low, high) in ranges.items():
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            query[RANGE_FIELDS[name]] = bounds
+
+    if after:
+        values = decode_cursor(after, sort)
+        if sort == "vin":
+            query["vin"] = {"$gt": values[0]}
+        else:
+            price, vin = values
+            # Nulls sort first: past a null price, every priced row follows
+            later_price = {"$gt": price} if price is not None else {"$ne": None}
+            query["$or"] = [
+                {"price": later_price},
+                {"price": price, "vin": {"$gt": vin}}
+            ]
+
+    return query
+
+
+def vehicles_projection(fields: str = None, sort: str = "vin") -> dict:
+    """Comma-separated `fields`, plus the sort keys the cursor is built from."""
+    if not fields:
+        return {"_id": 0}
+
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [f for f in names if not FIELD_RE.match(f)]
+    if bad:
+        raise ValueError(f"Invalid field names: {bad}")
+
+    return {"_id": 0, **{f: 1 for f in names}, **{k: 1 for k in SORT_KEYS[sort]}}
+
+
+def sort_spec(sort: str) -> list:
+    return [(k, 1) for k in SORT_KEYS[sort]]
+
+
+async def read_page(col, query: dict, projection: dict, sort: str, limit: int) -> dict:
+    """One page plus the cursor for the next (None on the last page)."""
+    docs = await col.find(query, projection).sort(sort_spec(sort)).limit(limit + 1).to_list(None)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    return {
+        "items": docs,
+        "count": len(docs),
+        "next_cursor": encode_cursor(docs[-1], sort) if has_more else None
+    }
+
+
+async def stream_ndjson(col, query: dict, projection: dict, sort: str, limit: int = None):
+    """Yield one JSON line per document as the cursor produces them."""
+    cursor = col.find(query, projection).sort(sort_spec(sort)).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    async for doc in cursor:
+        yield orjson.dumps(doc) + b"\n"
@@ -0,0 +1,258 @@
+# api/report.py
+"""
+The /report payload.
+
+It is assembled once at the end of every pipeline run and stored in
+report_snapshots as a ready-to-send JSON body, so /report is one indexed
+read of a document consistent with a single sync. build_report() also
+serves /report?live=true.
+"""
+import asyncio
+import math
+import os
+import zlib
+from datetime import datetime, timezone
+
+import orjson
+from pymongo.errors import OperationFailure
+
+from db.mongo import (
+    vehicles_col,
+    sync_logs_col,
+    ml_metrics_col,
+    report_snapshots_col,
+    report_snapshots_async_col,
+)
+from ml.predict import cached_or_live_prices, served_model
+
+REPORT_SNAPSHOT_KEEP = int(os.getenv("REPORT_SNAPSHOT_KEEP", "30"))
+
+PERCENTILES = [0.25, 0.5, 0.75]
+
+
+def _aggregate_pipeline(percentiles: bool, version) -> list:
+    # Only predictions stored by the served model count (none for an unversioned one)
+    is_current = {"$eq": ["$model_version", version]} if version is not None else False
+    delta = {"$cond": [is_current, {"$subtract": ["$predicted_price", "$price"]}, None]}
+    predicted = {"$cond": [{"$and": [is_current, {"$isNumber": "$predicted_price"}]}, 1, 0]}
+
+    if percentiles:
+        # $percentile needs MongoDB 7.0+
+        def spread(field):
+            return {"$percentile": {"input": field, "p": PERCENTILES, "method": "approximate"}}
+    else:
+        def spread(field):
+            return {"$push": field}
+
+    return [
+        {"$match": {"status": "active"}},
+        {"$facet": {
+            "by_year_model": [
+                {"$group": {
+                    # Stored at sync time with ml.features.parse_title
+                    "_id": {"year": "$year", "model": "$model_family"},
+                    "count": {"$sum": 1},
+                    "price_mean": {"$avg": "$price"},
+                    "price": spread("$price"),
+                    "mileage": spread("$mileage_km"),
+                    "predicted_delta_mean": {"$avg": delta}
+                }},
+                {"$sort": {"_id.year": -1, "_id.model": 1}}
+            ],
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "predicted": {"$sum": predicted},
+                    "price_mean": {"$avg": "$price"},
+                    "mileage_mean": {"$avg": "$mileage_km"},
+                    "predicted_delta_mean": {"$avg": delta}
+                }}
+            ]
+        }}
+    ]
+
+
+def _quantiles(values) -> list:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return [None] * len(PERCENTILES)
+    return [values[min(int(p * len(values)), len(values) - 1)] for p in PERCENTILES]
+
+
+def inventory_aggregates(col=None, version=None) -> dict:
+    """
+    Counts, means, price / mileage quartiles by (year, model family) and
+    the mean predicted-minus-actual price over predictions stored by
+    model `version`, in one aggregation.
+    """
+    col = col if col is not None else vehicles_col
+    try:
+        result = next(col.aggregate(_aggregate_pipeline(True, version)))
+    except OperationFailure:
+        # Older servers: push the values and take the quartiles here
+        result = next(col.aggregate(_aggregate_pipeline(False, version), allowDiskUse=True))
+        for group in result["by_year_model"]:
+            group["price"] = _quantiles(group["price"])
+            group["mileage"] = _quantiles(group["mileage"])
+
+    groups = [
+        {
+            "year": g["_id"]["year"],
+            "model": g["_id"]["model"],
+            "count": g["count"],
+            "price_mean": g["price_mean"],
+            "price_quartiles": g["price"],
+            "mileage_quartiles": g["mileage"],
+            "predicted_delta_mean": g["predicted_delta_mean"]
+        }
+        for g in result["by_year_model"]
+    ]
+    totals = (result["totals"] or [{}])[0]
+    totals.pop("_id", None)
+    return {"totals": totals, "by_year_model": groups}
+
+
+def build_report(vehicles=None, sync_logs=None, ml_metrics=None) -> dict:
+    """The /report payload, read from the given collections (default: primary)."""
+    vehicles = vehicles if vehicles is not None else vehicles_col
+    sync_logs = sync_logs if sync_logs is not None else sync_logs_col
+    ml_metrics = ml_metrics if ml_metrics is not None else ml_metrics_col
+
+    # 1️⃣ Active Vehicles
+    rows = list(vehicles.find({"status": "active"}, {"_id": 0}).sort("price", 1))
+
+    # Stored predictions where current, one batched predict call for the rest
+    try:
+        served = served_model()
+    except FileNotFoundError:
+        served = None
+    if served is not None:
+        predictions = cached_or_live_prices(rows, served)
+    else:
+        predictions = [math.nan] * len(rows)
+
+    for v, predicted in zip(rows, predictions):
+        # NaN: this row is missing year / mileage
+        if not math.isnan(predicted) and v.get("price") is not None:
+            v["predicted_price"] = float(predicted)
+            v["price_difference"] = float(predicted) - v["price"]
+        else:
+            v["predicted_price"] = None
+            v["price_difference"] = None
+
+    aggregates = inventory_aggregates(vehicles, served[1] if served else None)
+    total_active = aggregates["totals"].get("count", 0)
+
+    # 2️⃣ Latest Sync Info
+    latest_sync = sync_logs.find_one(sort=[("timestamp", -1)])
+
+    sync_section = {
+        "Last Sync": latest_sync["timestamp"].isoformat() if latest_sync else None,
+        "New Vehicles Added": latest_sync.get("new_count", 0) if latest_sync else 0,
+        "Vehicles Updated": latest_sync.get("updated_count", 0) if latest_sync else 0,
+        "Vehicles Removed": latest_sync.get("removed_count", 0) if latest_sync else 0,
+        "Total Active": total_active
+    }
+
+    # 3️⃣ Latest ML Metrics
+    latest_ml = ml_metrics.find_one(sort=[("trained_at", -1)])
+
+    if latest_ml:
+        last_trained = (
+            latest_ml.get("trained_at").isoformat()
+            if latest_ml.get("trained_at")
+            else None
+        )
+
+        # Holdout metrics, as written by train_model()
+        ml_section = {
+            "Model Used": latest_ml.get("model"),
+            "Model Version": latest_ml.get("model_version"),
+            "Features": latest_ml.get("features", []),
+            "Evaluation": latest_ml.get("evaluation"),
+            "MAE": latest_ml.get("mae"),
+            "RMSE": latest_ml.get("rmse"),
+            "R2 Score": latest_ml.get("r2"),
+            "Last Trained": last_trained
+        }
+    else:
+        ml_section = {
+            "Model Used": None,
+            "Model Version": None,
+            "Features": [],
+            "Evaluation": None,
+            "MAE": None,
+            "RMSE": None,
+            "R2 Score": None,
+            "Last Trained": None
+        }
+
+    automation_section = {
+        "Trigger": "Every 24 Hours",
+        "Manual Trigger Endpoint": "/trigger-sync",
+        "Status": "Operational"
+    }
+
+    return {
+        "Company": "Audi West Island",
+        "Generated At": datetime.now(timezone.utc).isoformat(),
+        "Total Vehicles": total_active,
+        "Vehicles": rows,
+        "Aggregates": aggregates,
+        "Database Sync": sync_section,
+        "ML Price Prediction": ml_section,
+        "Automation": automation_section
+    }
+
+
+def publish_report_snapshot(job_id: str = None, keep: int = REPORT_SNAPSHOT_KEEP) -> dict:
+    """
+    Build the report against the primary and store it as a compressed
+    JSON body (the vehicle list can outgrow a plain 16 MB document).
+    """
+    report = build_report()
+    body = orjson.dumps(report, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    snapshot = {
+        "created_at": datetime.now(timezone.utc),
+        "job_id": job_id,
+        "last_sync": report["Database Sync"]["Last Sync"],
+        "model_version": report["ML Price Prediction"]["Model Version"],
+        "total_active": report["Total Vehicles"],
+        "aggregates": report["Aggregates"],
+        "body_bytes": len(body),
+        "body": zlib.compress(body, 6)
+    }
+    report_snapshots_col.insert_one(snapshot)
+
+    # Keep the last few for comparison; drop the rest
+    old = report_snapshots_col.find({}, {"_id": 1}).sort("created_at", -1).skip(keep)
+    old_ids = [doc["_id"] for doc in old]
+    if old_ids:
+        report_snapshots_col.delete_many({"_id": {"$in": old_ids}})
+
+    print(f"📊 Report snapshot stored ({snapshot['total_active']} vehicles, {len(body)} bytes)")
+    return {k: snapshot[k] for k in ("created_at", "total_active", "body_bytes")}
+
+
+async def latest_snapshot_at():
+    """created_at of the newest snapshot (covered by its index), or None."""
+    doc = await report_snapshots_async_col.find_one(
+        {}, {"_id": 0, "created_at": 1}, sort=[("created_at", -1)]
+    )
+    return doc["created_at"] if doc else None
+
+
+async def snapshot_body(created_at):
+    """
+    The stored JSON body, or None if that snapshot is gone; only read
+    when the response cache misses.
+    """
+    doc = await report_snapshots_async_col.find_one(
+        {"created_at": created_at}, {"_id": 0, "body": 1}
+    )
+    if doc is None:
+        return None
+    # Decompressing a large report is CPU work: off the event loop
+    return await asyncio.to_thread(zlib.decompress, doc["body"])
@@ -0,0 +1,197 @@
+# benchmarks/bench_api_load.py
+"""
+Load test for the API read endpoints: RPS and p50 / p99 latency at
+several concurrency levels.
+
+    # seed a local mongod, start uvicorn on it, then load it
+    python -m benchmarks.bench_api_load --serve --seed 5000 --concurrency 1 16 64
+    # or point it at an API that is already running
+    python -m benchmarks.bench_api_load --url http://127.0.0.1:8000
+
+Run it on two commits with --out and compare them with --compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks.mongo_backend import require_bench_database  # also defaults MONGO_URI
+
+DEFAULT_ENDPOINTS = [
+    "/vehicles?limit=100",
+    "/vehicles/{vin}/predict",
+    "/sync-status",
+    "/report",
+]
+
+
+def seed(n: int, train: bool):
+    """Fill the MONGO_URI database the way one pipeline run would."""
+    # Imported here: ml.model_store reads MODEL_DIR at import time
+    from benchmarks.bench_sync import scraped_vehicles
+    from db.mongo import get_db, vehicles_col, vehicle_history_col, sync_logs_col
+    from sync.sync_engine import sync_vehicles
+    from api.report import publish_report_snapshot
+
+    require_bench_database(get_db())
+    vehicles_col.drop()
+    vehicle_history_col.drop()
+
+    now = datetime.now(timezone.utc)
+    counts = sync_vehicles(scraped_vehicles(n, now), now)
+    sync_logs_col.insert_one({
+        "timestamp": now,
+        "new_count": counts["added"],
+        "updated_count": counts["updated"],
+        "unchanged_count": counts["unchanged"],
+        "removed_count": counts["removed"],
+        "total_active": counts["total_active"]
+    })
+
+    if train:
+        from ml.train import train_model
+        train_model()
+
+    publish_report_snapshot()
+    return vehicles_col.find_one({}, {"_id": 0, "vin": 1})["vin"]
+
+
+def start_server(port: int, workers: int):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    proc.terminate()
+    raise RuntimeError("API did not come up within 60s")
+
+
+async def load(url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    await response.aread()
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "endpoint": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+    }
+
+
+def compare(before_path: str, results):
+    with open(before_path) as f:
+        before = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    print(f"\n{'endpoint':<28} | {'conc':>4} | {'rps before':>10} | {'rps after':>9} | "
+          f"{'p99 before':>10} | {'p99 after':>9}")
+    for r in results:
+        b = before.get((r["endpoint"], r["concurrency"]))
+        if b is None:
+            continue
+        print(f"{r['endpoint']:<28} | {r['concurrency']:>4} | {b['rps']:>10} | {r['rps']:>9} | "
+              f"{b['p99_ms']:>10} | {r['p99_ms']:>9}")
+
+
+def main(args):
+    proc = None
+    vin = args.vin
+    url = args.url
+
+    if args.serve:
+        if args.train:
+            # Publish into a scratch dir (inherited by uvicorn), not ml/models
+            os.environ["MODEL_DIR"] = tempfile.mkdtemp(prefix="bench-models-")
+            print(f"🧪 Benchmark model published to {os.environ['MODEL_DIR']}")
+        vin = seed(args.seed, args.train)
+        proc, url = start_server(args.port, args.workers)
+
+    try:
+        results = []
+        print(f"{'endpoint':<28} | {'conc':>4} | {'requests':>8} | {'errors':>6} | "
+              f"{'rps':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+        for template in args.endpoints:
+            if "{vin}" in template and not vin:
+                print(f"⏭️ {template}: no --vin to substitute")
+                continue
+            path = template.replace("{vin}", vin or "")
+
+            for concurrency in args.concurrency:
+                r = asyncio.run(load(url, path, concurrency, args.duration))
+                r["endpoint"] = template
+                results.append(r)
+                print(f"{template:<28} | {concurrency:>4} | {r['requests']:>8} | {r['errors']:>6} | "
+                      f"{r['rps']:>8} | {r['p50_ms']:>8} | {r['p99_ms']:>8}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"seed": args.seed if args.serve else None, "results": results}, f, indent=2)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--serve", action="store_true",
+                        help="seed MONGO_URI and start uvicorn on it")
+    parser.add_argument("--seed", type=int, default=5000)
+    parser.add_argument("--train", action="store_true",
+                        help="train a model after seeding (published to a temporary MODEL_DIR)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--vin", help="VIN for /vehicles/{vin}/predict without --serve")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+
+    main(parser.parse_args())
@@ -0,0 +1,244 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline benchmark: time every stage at several inventory
+sizes against local stand-ins, write the numbers as JSON, and fail when
+a stage got slower than a baseline run.
+
+    python -m benchmarks.bench_pipeline --backend mongomock --sizes 500 2000
+    python -m benchmarks.bench_pipeline --backend mongod --sizes 500 2000 10000 \\
+        --baseline benchmarks/results/<older commit>.json --threshold 0.25
+
+Stages:
+    scrape        Playwright against the stand-in site (feed capture)
+    sync          first sync (every vehicle inserted) / resync (unchanged)
+    train         load_training_data + feature encoding + estimator fit
+    predict       one vectorized predict over the whole inventory
+    api_vehicles  GET /vehicles, uncached (mongod only)
+    api_report    GET /report?live=true, uncached (mongod only)
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.bench_sync import scraped_vehicles
+from benchmarks.fixtures import StandinInventorySite, synthetic_vehicles
+from benchmarks.mongo_backend import get_database, require_bench_database
+
+RESULTS_DIR = "benchmarks/results"
+# Stages faster than this are too noisy to flag as regressions
+MIN_REGRESSION_MS = 5.0
+# mongomock's $in / $nin matching is quadratic: 10k vehicles take minutes there
+DEFAULT_SIZES = {"mongomock": [500, 2000], "mongod": [500, 2000, 10000]}
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ---------------------------------
+# STAGES
+# ---------------------------------
+
+async def stage_scrape(n: int):
+    from scraper.scrape_inventory import scrape_inventory
+
+    with StandinInventorySite(synthetic_vehicles(n)) as site:
+        start = time.perf_counter()
+        scraped = await scrape_inventory(capture=True, url=site.url)
+        return _ms(start), scraped
+
+
+def stage_sync(db, scraped):
+    from sync.sync_engine import sync_vehicles
+
+    timings = {}
+    for phase in ("sync", "resync"):
+        now = datetime.now(timezone.utc)
+        batch = [{**v, "date_scraped": now, "last_seen": now} for v in scraped]
+        start = time.perf_counter()
+        sync_vehicles(batch, now, col=db["vehicles"], history_col=db["vehicle_history"])
+        timings[phase] = _ms(start)
+    return timings
+
+
+def stage_train(db, kind: str):
+    from ml.dataset import load_training_data
+    from ml.features import FeatureEncoder
+    from ml.train import build_estimator
+
+    start = time.perf_counter()
+    frame, y, stats = load_training_data(col=db["vehicles"])
+    encoder = FeatureEncoder().fit(frame)
+    X, _ = encoder.transform(frame)
+    model = build_estimator(kind).fit(X, y)
+    if kind != "hgb":
+        model.set_params(n_jobs=1)
+    return _ms(start), stats["load_ms"], model, encoder
+
+
+def stage_predict(vehicles, model, encoder, repeat: int):
+    from ml.features import to_frame
+    from ml.predict import predict_frame
+
+    frame = to_frame(vehicles)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_frame(frame, model=model, encoder=encoder)
+        best = _ms(start) if best is None else min(best, _ms(start))
+    return best
+
+
+async def stage_api(repeat: int):
+    """In-process ASGI calls: no network, no lifespan (no job worker)."""
+    import httpx
+    import api.main as main
+    from db.mongo import close_async_clients
+
+    main.response_cache.backend = None  # measure the build, not the cache
+    timings = {}
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for stage, path in (("api_vehicles", "/vehicles"), ("api_report", "/report?live=true")):
+                best = None
+                for _ in range(repeat):
+                    main.response_cache.invalidate()
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    best = _ms(start) if best is None else min(best, _ms(start))
+                timings[stage] = best
+    finally:
+        await close_async_clients()
+    return timings
+
+
+# ---------------------------------
+# SUITE
+# ---------------------------------
+
+def run_size(db, n: int, args) -> dict:
+    import ml.predict
+
+    timings = {}
+    db["vehicles"].drop()
+    db["vehicle_history"].drop()
+    db["vehicles"].create_index("vin", unique=True)
+
+    scraped = None
+    if not args.skip_scrape:
+        timings["scrape"], scraped = asyncio.run(stage_scrape(n))
+    if scraped is None:
+        scraped = scraped_vehicles(n, datetime.now(timezone.utc))
+
+    timings.update(stage_sync(db, scraped))
+    timings["train"], timings["train_load"], model, encoder = stage_train(db, args.kind)
+    timings["predict"] = stage_predict(scraped, model, encoder, args.repeat)
+
+    if args.backend == "mongod":
+        # Serve the benchmark model, not whatever ml/models holds
+        state = (model, "bench", None, encoder)
+        ml.predict._current_state = lambda: state
+        timings.update(asyncio.run(stage_api(args.repeat)))
+
+    return timings
+
+
+def check_regressions(baseline: dict, current: dict, threshold: float,
+                      min_ms: float = MIN_REGRESSION_MS):
+    """(size, stage, before, after) for every stage slower than 1 + threshold."""
+    regressions = []
+    for size, stages in current["results"].items():
+        before = baseline.get("results", {}).get(size, {})
+        for stage, ms in stages.items():
+            old = before.get(stage)
+            if old is None or ms is None or max(old, ms) < min_ms:
+                continue
+            if ms > old * (1 + threshold):
+                regressions.append((size, stage, old, ms))
+    return regressions
+
+
+def main(args):
+    db = get_database(args.backend, args.uri)
+    args.sizes = args.sizes or DEFAULT_SIZES[args.backend]
+    if args.backend == "mongod":
+        require_bench_database(db)
+        # The API stages read through db.mongo: same database
+        os.environ["MONGO_URI"] = args.uri or os.environ["MONGO_URI"]
+
+    results = {}
+    for n in args.sizes:
+        print(f"⏱️ {n} vehicles...")
+        results[str(n)] = run_size(db, n, args)
+
+    stages = sorted({s for r in results.values() for s in r})
+    print(f"\n{'stage':<13}" + "".join(f" | {n:>9}" for n in results))
+    for stage in stages:
+        row = "".join(
+            f" | {results[n].get(stage, '-'):>9}" for n in results
+        )
+        print(f"{stage:<13}{row}")
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "backend": args.backend,
+            "model_kind": args.kind,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {out} (ms per stage)")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = check_regressions(baseline, report, args.threshold)
+        for size, stage, old, new in regressions:
+            print(f"❌ {stage} @ {size}: {old} ms -> {new} ms (+{(new / old - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No stage slower than +{args.threshold * 100:.0f}% vs {baseline['meta']['commit']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--uri")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="inventory sizes (default: 500 2000, plus 10000 on mongod)")
+    parser.add_argument("--kind", default="rf_compact", help="MODEL_KIND used for the train stage")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of the read-only stages (best is kept)")
+    parser.add_argument("--skip-scrape", action="store_true",
+                        help="no Playwright: feed the synthetic vehicles to sync directly")
+    parser.add_argument("--out", help=f"JSON path (default {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--baseline", help="earlier results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown per stage (0.25 = +25%%)")
+
+    main(parser.parse_args())
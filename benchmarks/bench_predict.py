@@ -0,0 +1,94 @@
+# benchmarks/bench_predict.py
+"""
+Per-vehicle inference latency: predict_price() in a loop vs one
+predict_prices() call, on a forest shaped like the production model.
+First checks that FlatForest predicts exactly what sklearn does.
+
+    python -m benchmarks.bench_predict --sizes 100 1000 10000
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+import ml.predict as predict
+from benchmarks.fixtures import synthetic_vehicles
+from ml.fast_forest import FlatForest
+from ml.features import FeatureEncoder, to_frame
+
+# Full trees, depth-limited trees, and trees with leaves above max depth
+PARITY_PARAMS = [
+    {"n_estimators": 50},
+    {"n_estimators": 50, "max_depth": 4},
+    {"n_estimators": 50, "max_depth": 12, "min_samples_leaf": 20},
+]
+
+
+def vehicle_dicts(n: int, seed: int = 7):
+    return [
+        {
+            "year": int(v["title"][:4]), "mileage_km": v["mileage"], "price": v["price"],
+            "title": v["title"], "trim": v["trim"]
+        }
+        for v in synthetic_vehicles(n, seed)
+    ]
+
+
+def fit_model(n_train: int = 2000):
+    train = vehicle_dicts(n_train, seed=1)
+    frame = to_frame(train)
+    encoder = FeatureEncoder().fit(frame)
+    X, _ = encoder.transform(frame)
+    y = np.array([v["price"] for v in train], dtype=float)
+    return RandomForestRegressor(n_estimators=200, random_state=42).fit(X, y), encoder
+
+
+def check_flat_forest(n: int = 2000):
+    """FlatForest(m).predict(X) == m.predict(X) for differently shaped forests."""
+    train = vehicle_dicts(n, seed=3)
+    frame = to_frame(train)
+    encoder = FeatureEncoder().fit(frame)
+    X, _ = encoder.transform(frame)
+    y = np.array([v["price"] for v in train], dtype=float)
+    X_eval, _ = encoder.transform(to_frame(vehicle_dicts(n, seed=4)))
+
+    for params in PARITY_PARAMS:
+        forest = RandomForestRegressor(random_state=42, **params).fit(X, y)
+        FlatForest(forest).check_matches(forest, X_eval)
+        print(f"✅ FlatForest matches sklearn {params}")
+
+
+def main(sizes, loop_cap: int):
+    check_flat_forest()
+
+    # Serve the benchmark model without publishing an artifact
+    model, encoder = fit_model()
+    state = (model, None, None, encoder)
+    predict._current_state = lambda: state
+
+    print(f"{'vehicles':>8} | {'loop µs/veh':>12} | {'batch µs/veh':>12} | {'speedup':>7}")
+    for n in sizes:
+        vehicles = vehicle_dicts(n)
+
+        # The per-row loop is slow; time a capped sample and extrapolate per vehicle
+        sample = vehicles[:loop_cap]
+        start = time.perf_counter()
+        for v in sample:
+            predict.predict_price(v)
+        loop_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        start = time.perf_counter()
+        predict.predict_prices(vehicles)
+        batch_us = (time.perf_counter() - start) / n * 1e6
+
+        print(f"{n:>8} | {loop_us:>12.1f} | {batch_us:>12.2f} | {loop_us / batch_us:>6.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--loop-cap", type=int, default=500)
+    args = parser.parse_args()
+
+    main(args.sizes, args.loop_cap)
@@ -0,0 +1,119 @@
+# benchmarks/bench_scrape_capture.py
+"""
+Wall time of a full scrape: inventory feed capture vs DOM path,
+against the local stand-in site.
+
+    python -m benchmarks.bench_scrape_capture --vehicles 100 500
+    python -m benchmarks.bench_scrape_capture --check
+    python -m benchmarks.bench_scrape_capture --har recorded.har
+
+--check parses the committed HAR fixture offline (no browser) and
+compares the result with the vehicles it was built from.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fixtures import StandinInventorySite, feed_har, synthetic_vehicles
+from scraper.scrape_inventory import (
+    load_har_payloads,
+    scrape_inventory,
+    select_feed_vehicles,
+    vehicles_from_payloads,
+)
+
+# benchmarks/fixtures/inventory_feed.har: two feed pages listing
+# synthetic_vehicles(30, seed=5), plus a "similar vehicles" response
+HAR_FIXTURE = "benchmarks/fixtures/inventory_feed.har"
+HAR_FIXTURE_VEHICLES = 30
+HAR_FIXTURE_SEED = 5
+
+
+async def timed_scrape(site_kwargs, vehicles, capture: bool):
+    with StandinInventorySite(vehicles, **site_kwargs) as site:
+        start = time.perf_counter()
+        scraped = await scrape_inventory(capture=capture, url=site.url)
+        return time.perf_counter() - start, len(scraped)
+
+
+async def main(sizes, latency: float):
+    rows = []
+
+    for n in sizes:
+        vehicles = synthetic_vehicles(n)
+        site_kwargs = {"latency": latency}
+
+        capture_s, captured = await timed_scrape(site_kwargs, vehicles, True)
+        dom_s, found = await timed_scrape(
+            {**site_kwargs, "feed_visible": False}, vehicles, False
+        )
+        assert captured == found == n
+        rows.append((n, capture_s, dom_s))
+
+    print(f"{'vehicles':>8} | {'capture s':>9} | {'dom s':>7}")
+    for n, capture_s, dom_s in rows:
+        print(f"{n:>8} | {capture_s:>9.2f} | {dom_s:>7.2f}")
+
+
+def fixture_vehicles():
+    listed = synthetic_vehicles(HAR_FIXTURE_VEHICLES, HAR_FIXTURE_SEED)
+    similar = [dict(v, vin="WAUSIM" + v["vin"][6:]) for v in synthetic_vehicles(4, seed=6)]
+    return listed, similar
+
+
+def write_har_fixture(path: str = HAR_FIXTURE):
+    listed, similar = fixture_vehicles()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(feed_har(listed, page_size=24, similar=similar), f, indent=1)
+
+
+def check_har_fixture(path: str = HAR_FIXTURE):
+    """The feed parser on the HAR fixture yields exactly the listed vehicles."""
+    listed, similar = fixture_vehicles()
+    now = datetime.now(timezone.utc)
+
+    captured = vehicles_from_payloads(load_har_payloads(path), now)
+    assert len(captured) == len(listed) + len(similar), len(captured)
+
+    selected = select_feed_vehicles(captured, [v["vin"] for v in listed])
+    assert selected is not None, "feed does not cover the listed VINs"
+    for got, want in zip(selected, listed):
+        assert got["vin"] == want["vin"]
+        assert got["title"] == want["title"] and got["trim"] == want["trim"]
+        assert got["year"] == int(want["title"][:4])
+        assert got["price"] == want["price"]
+        assert got["mileage_km"] == want["mileage"]
+        assert got["listing_url"].endswith(f"vehicleId={want['vin']}")
+
+    # One listed VIN missing from the feed: it must not be trusted
+    assert select_feed_vehicles(captured[1:], [v["vin"] for v in listed]) is None
+    print(f"✅ {path}: {len(selected)} listed vehicles parsed, {len(similar)} unlisted ignored")
+
+
+def replay_har(path: str):
+    payloads = load_har_payloads(path)
+    vehicles = vehicles_from_payloads(payloads, datetime.now(timezone.utc))
+    print(f"{len(payloads)} feed responses -> {len(vehicles)} vehicles")
+    for v in vehicles[:5]:
+        print(v)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--har", help="replay a recorded HAR instead of benchmarking")
+    parser.add_argument("--check", action="store_true", help="check the parser on the HAR fixture")
+    parser.add_argument("--write-fixture", action="store_true", help="regenerate the HAR fixture")
+    args = parser.parse_args()
+
+    if args.write_fixture:
+        write_har_fixture()
+    if args.check or args.write_fixture:
+        check_har_fixture()
+    elif args.har:
+        replay_har(args.har)
+    else:
+        asyncio.run(main(args.vehicles, args.latency))
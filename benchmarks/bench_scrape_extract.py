@@ -0,0 +1,73 @@
+# benchmarks/bench_scrape_extract.py
+"""
+Per-card extraction cost: legacy per-field calls vs one evaluate_all.
+
+    python -m benchmarks.bench_scrape_extract --cards 50 200 1000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+from playwright.async_api import async_playwright
+
+from benchmarks.fixtures import write_inventory_html
+from scraper.scrape_inventory import (
+    TITLE_SELECTOR,
+    extract_cards,
+    extract_cards_per_card,
+    parse_cards,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+async def time_mode(page, extract, repeat: int):
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raw_cards = await extract(page)
+        vehicles = parse_cards(raw_cards, datetime.now(timezone.utc))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, len(vehicles)
+
+
+async def main(card_counts, repeat: int):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+
+        print(f"{'cards':>7} | {'legacy ms/card':>15} | {'batch ms/card':>14} | {'speedup':>7}")
+
+        for n in card_counts:
+            path = write_inventory_html(
+                os.path.join(FIXTURE_DIR, f"inventory_{n}.html"), n
+            )
+            await page.goto("file://" + os.path.abspath(path))
+            await page.wait_for_selector(TITLE_SELECTOR)
+
+            legacy, found = await time_mode(page, extract_cards_per_card, repeat)
+            batch, found_batch = await time_mode(page, extract_cards, repeat)
+            assert found == found_batch == n
+
+            print(
+                f"{n:>7} | {legacy / n * 1000:>15.3f} | "
+                f"{batch / n * 1000:>14.3f} | {legacy / batch:>6.1f}x"
+            )
+
+        await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.cards, args.repeat))
@@ -0,0 +1,105 @@
+# benchmarks/bench_sync.py
+"""
+Round trips and wall time of the sync write path: per-vehicle update_one
+(legacy) vs bulk_write.
+
+    python -m benchmarks.bench_sync --backend mongomock --sizes 1000 2000
+    python -m benchmarks.bench_sync --backend mongod --sizes 1000 10000 100000
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from benchmarks.mongo_backend import CountingCollection, get_database
+from benchmarks.fixtures import synthetic_vehicles
+from sync.sync_engine import normalize_price, sync_vehicles
+
+
+def scraped_vehicles(n: int, now: datetime):
+    return [
+        {
+            "vin": v["vin"],
+            "title": v["title"],
+            "trim": v["trim"],
+            "year": int(v["title"][:4]),
+            "price": v["price"],
+            "mileage_km": v["mileage"],
+            "listing_url": f"https://www.audiwestisland.com/?vehicleId={v['vin']}",
+            "status": "active",
+            "date_scraped": now,
+            "last_seen": now
+        }
+        for v in synthetic_vehicles(n)
+    ]
+
+
+def legacy_sync(scraped, now, col, history_col):
+    """The pre-bulk loop: distinct + one update_one per vehicle + count."""
+    scraped_map = {v["vin"]: v for v in scraped}
+    db_vins = set(col.distinct("vin"))
+
+    for vin, vehicle in scraped_map.items():
+        normalize_price(vehicle)
+        vehicle_update = vehicle.copy()
+        vehicle_update.pop("date_scraped", None)
+        col.update_one(
+            {"vin": vin},
+            {"$set": {**vehicle_update, "last_seen": now, "status": "active"},
+             "$setOnInsert": {"date_scraped": now}},
+            upsert=True
+        )
+
+    removed_vins = db_vins - set(scraped_map)
+    if removed_vins:
+        col.update_many({"vin": {"$in": list(removed_vins)}},
+                        {"$set": {"status": "inactive"}})
+    col.count_documents({"status": "active"})
+
+
+def run(db, name: str, n: int, sync_fn):
+    col = db[f"bench_vehicles_{name}"]
+    history_col = db[f"bench_history_{name}"]
+    col.drop()
+    history_col.drop()
+    col.create_index("vin", unique=True)
+
+    rows = []
+    for phase in ("initial", "resync"):
+        now = datetime.now(timezone.utc)
+        scraped = scraped_vehicles(n, now)
+        counting = CountingCollection(col)
+
+        start = time.perf_counter()
+        sync_fn(scraped, now, counting, history_col)
+        rows.append((phase, counting.calls, time.perf_counter() - start))
+
+    col.drop()
+    history_col.drop()
+    return rows
+
+
+def main(backend: str, uri: str, sizes):
+    # mongomock's $in / $nin matching is quadratic: keep its default small
+    sizes = sizes or ([1000, 10000, 100000] if backend == "mongod" else [1000, 2000])
+    db = get_database(backend, uri)
+
+    print(f"{'vehicles':>8} | {'mode':>6} | {'phase':>7} | {'round trips':>11} | {'wall s':>7}")
+    for n in sizes:
+        for name, fn in (
+            ("legacy", legacy_sync),
+            ("bulk", lambda scraped, now, col, history_col: sync_vehicles(
+                scraped, now, col=col, history_col=history_col)),
+        ):
+            for phase, calls, seconds in run(db, name, n, fn):
+                print(f"{n:>8} | {name:>6} | {phase:>7} | {calls:>11} | {seconds:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--uri")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="inventory sizes (default: 1000 2000, or 1000 10000 100000 on mongod)")
+    args = parser.parse_args()
+
+    main(args.backend, args.uri, args.sizes)
@@ -0,0 +1,247 @@
+# benchmarks/fixtures.py
+import json
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# model -> (new price CAD, share of the used inventory)
+MODELS = {
+    "A3": (38000, 8), "A4": (46000, 12), "A4 allroad": (53000, 4),
+    "A5 Sportback": (52000, 10), "A6": (62000, 6), "Q3": (42000, 14),
+    "Q5": (52000, 18), "Q5 Sportback": (57000, 6), "Q7": (70000, 9),
+    "Q8": (82000, 4), "e-tron": (86000, 4), "RS 5": (92000, 2), "S4": (60000, 3),
+}
+# trim -> price multiplier
+TRIMS = {
+    "Komfort": 1.0, "Progressiv": 1.08, "Progressiv S line": 1.12,
+    "Technik": 1.18, "Technik S line": 1.22,
+}
+CURRENT_YEAR = 2025
+
+
+def synthetic_vehicles(n: int, seed: int = 42):
+    """
+    Raw card fields shaped like the live inventory page: popular models
+    more common, mostly 1-6 year old cars, ~17k km a year, and prices
+    from model / trim / age / mileage with dealer-style rounding.
+    """
+    rng = random.Random(seed)
+    names = list(MODELS)
+    weights = [MODELS[m][1] for m in names]
+    trims = list(TRIMS)
+    vehicles = []
+
+    for i in range(n):
+        model = rng.choices(names, weights)[0]
+        trim = rng.choices(trims, [30, 30, 15, 15, 10])[0]
+        age = min(10, max(0, int(rng.triangular(0, 10, 2))))
+        year = CURRENT_YEAR - age
+
+        yearly_km = max(4000, rng.gauss(17000, 5000))
+        mileage = max(500, int(yearly_km * (age + rng.random())))
+
+        new_price = MODELS[model][0] * TRIMS[trim]
+        value = new_price * 0.86 ** age - 0.04 * mileage
+        price = max(9000, int(rng.gauss(value, value * 0.05) / 100) * 100 - 5)
+
+        vehicles.append({
+            "vin": f"WAU{i:014d}",
+            "title": f"{year} Audi {model}",
+            "trim": trim,
+            "mileage": mileage,
+            "price": price
+        })
+
+    return vehicles
+
+
+def render_inventory_html(vehicles) -> str:
+    """Static copy of the inventory listing markup the scraper targets."""
+    cards = []
+
+    for v in vehicles:
+        href = f"/fr/inventaire/occasion/?vehicleId={v['vin']}"
+        cards.append(
+            '<div class="T3Card-styles__CardContainer-sc-a6ff5dc7-1">'
+            f'<a href="{href}">'
+            f'<div data-testid="model-name">{escape(v["title"])}</div>'
+            f'<div data-testid="trim-name">{escape(v["trim"])}</div>'
+            f'<div data-testid="model-mileage">{v["mileage"]:,} km</div>'
+            '<div class="PriceBreakdown-styles__Total-sc-2a8ad1a6-6">'
+            f'{v["price"]:,} $</div>'
+            "</a></div>"
+        )
+
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'></head><body>"
+        + "\n".join(cards)
+        + "</body></html>"
+    )
+
+
+def write_inventory_html(path, n: int, seed: int = 42):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_inventory_html(synthetic_vehicles(n, seed)))
+    return path
+
+
+# ---------------------------------
+# LOCAL HTTP STAND-IN FOR THE SITE
+# ---------------------------------
+
+def feed_payload(vehicles, page: int, page_size: int):
+    """One page of a JSON inventory feed, as the live site's XHR returns it."""
+    chunk = vehicles[page * page_size:(page + 1) * page_size]
+    return {
+        "total": len(vehicles),
+        "page": page,
+        "results": [
+            {
+                "vin": v["vin"],
+                "title": v["title"],
+                "trim": v["trim"],
+                "odometer": v["mileage"],
+                "price": {"value": v["price"], "currency": "CAD"},
+                "detailUrl": f"/fr/inventaire/occasion/?vehicleId={v['vin']}"
+            }
+            for v in chunk
+        ]
+    }
+
+
+def _har_entry(url: str, mime: str, text: str, resource_type: str = "xhr"):
+    return {
+        "_resourceType": resource_type,
+        "request": {"method": "GET", "url": url},
+        "response": {"status": 200, "content": {"mimeType": mime, "text": text}}
+    }
+
+
+def feed_har(vehicles, page_size: int = 24, similar=()):
+    """
+    HAR of the inventory page's network traffic: the paged feed (with its
+    total nested under "meta", as some providers send it), an unrelated
+    "similar vehicles" feed for `similar`, and non-feed noise.
+    """
+    base = "https://www.audiwestisland.com"
+    entries = [_har_entry(base + "/fr/inventaire/occasion/", "text/html", "<html></html>", "document")]
+
+    for page in range((len(vehicles) + page_size - 1) // page_size):
+        payload = feed_payload(vehicles, page, page_size)
+        payload["meta"] = {"total": payload.pop("total")}
+        entries.append(_har_entry(
+            f"{base}/api/inventory?page={page}", "application/json", json.dumps(payload)
+        ))
+
+    if similar:
+        entries.append(_har_entry(
+            f"{base}/api/vehicles/similar?vehicleId={vehicles[0]['vin']}",
+            "application/json", json.dumps(feed_payload(list(similar), 0, len(similar)))
+        ))
+    entries.append(_har_entry(f"{base}/api/analytics", "application/json", '{"ok": true}'))
+
+    return {"log": {"version": "1.2", "entries": entries}}
+
+
+STANDIN_PAGE = """<!doctype html><html><head><meta charset='utf-8'></head><body>
+<div id="cards"></div>
+<section class="LoadMore-styles__Section"><button>Load more</button></section>
+<script>
+let page = 0;
+const fmt = n => n.toLocaleString("en-US");
+async function loadPage() {
+    const res = await fetch("__FEED__?page=" + page);
+    const data = await res.json();
+    const root = document.getElementById("cards");
+    for (const v of data.results) {
+        const card = document.createElement("div");
+        card.className = "T3Card-styles__CardContainer-sc-a6ff5dc7-1";
+        card.innerHTML =
+            `<a href="${v.detailUrl}">` +
+            `<div data-testid="model-name">${v.title}</div>` +
+            `<div data-testid="trim-name">${v.trim}</div>` +
+            `<div data-testid="model-mileage">${fmt(v.odometer)} km</div>` +
+            `<div class="PriceBreakdown-styles__Total-sc-2a8ad1a6-6">${fmt(v.price.value)} $</div></a>`;
+        root.appendChild(card);
+    }
+    page += 1;
+    if (page * __PAGE_SIZE__ >= data.total) {
+        document.querySelector("section button").remove();
+    }
+}
+document.querySelector("section button").addEventListener("click", loadPage);
+loadPage();
+</script></body></html>"""
+
+
+class StandinInventorySite:
+    """
+    Serves a paged inventory page + JSON feed on 127.0.0.1 for Playwright.
+    feed_visible=False moves the feed to a URL the capture pattern ignores,
+    which exercises the DOM fallback.
+
+        with StandinInventorySite(synthetic_vehicles(500)) as site:
+            await scrape_inventory(url=site.url)
+    """
+
+    def __init__(self, vehicles, page_size: int = 24, latency: float = 0.0,
+                 feed_visible: bool = True):
+        self.vehicles = vehicles
+        self.page_size = page_size
+        self.latency = latency
+        self.feed_path = "/api/inventory" if feed_visible else "/data/cards"
+        self._server = None
+        self._thread = None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: str, content_type: str):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+
+                if parsed.path == site.feed_path:
+                    time.sleep(site.latency)
+                    page = int(parse_qs(parsed.query).get("page", ["0"])[0])
+                    payload = feed_payload(site.vehicles, page, site.page_size)
+                    self._send(json.dumps(payload), "application/json")
+                elif parsed.path.startswith("/fr/inventaire/occasion"):
+                    html = (
+                        STANDIN_PAGE
+                        .replace("__FEED__", site.feed_path)
+                        .replace("__PAGE_SIZE__", str(site.page_size))
+                    )
+                    self._send(html, "text/html; charset=utf-8")
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/fr/inventaire/occasion/"
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
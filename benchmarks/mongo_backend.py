@@ -0,0 +1,70 @@
+# benchmarks/mongo_backend.py
+import os
+
+# A local mongod is the default stand-in
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/audi_bench")
+
+
+class CountingCollection:
+    """Wraps a collection and counts client calls (≈ network round trips)."""
+
+    COUNTED = {
+        "find", "find_one", "distinct", "count_documents", "insert_one",
+        "insert_many", "update_one", "update_many", "bulk_write", "aggregate",
+    }
+
+    def __init__(self, col):
+        self._col = col
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._col, name)
+        if name in self.COUNTED:
+            def counted(*args, **kwargs):
+                self.calls += 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+def _patch_mongomock_bulk(mongomock):
+    """
+    pymongo >= 4.11 passes `sort=` to UpdateOne / ReplaceOne bulk builders,
+    which mongomock 4.x does not accept. The app never sets a sort on them,
+    so drop the argument.
+    """
+    builder = mongomock.collection.BulkOperationBuilder
+    if getattr(builder, "_sort_shim", False):
+        return
+
+    def without_sort(method):
+        def wrapped(self, *args, sort=None, **kwargs):
+            return method(self, *args, **kwargs)
+        return wrapped
+
+    builder.add_update = without_sort(builder.add_update)
+    builder.add_replace = without_sort(builder.add_replace)
+    builder._sort_shim = True
+
+
+def get_database(backend: str, uri: str = None):
+    """`mongomock` (in-memory) or `mongod` (MONGO_URI / --uri)."""
+    if backend == "mongomock":
+        import mongomock
+        _patch_mongomock_bulk(mongomock)
+        return mongomock.MongoClient()["audi_bench"]
+
+    from pymongo import MongoClient
+    return MongoClient(uri or os.environ["MONGO_URI"]).get_default_database()
+
+
+def require_bench_database(db):
+    """
+    Benchmarks that drop the app's own collections must never run against
+    a real database: the name has to contain "bench".
+    """
+    if "bench" not in db.name:
+        raise SystemExit(
+            f"Refusing to drop collections in database {db.name!r}: "
+            "point MONGO_URI at a database whose name contains 'bench'"
+        )
@@ -0,0 +1,109 @@
+# db/indexes.py
+"""
+Index bootstrap and query-plan checks.
+
+    python -m db.indexes           # create / verify indexes (idempotent)
+    python -m db.indexes --check   # explain() every API query, fail on COLLSCAN
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from db.mongo import (
+    vehicles_col,
+    sync_logs_col,
+    ml_metrics_col,
+    vehicle_history_col,
+    report_snapshots_col,
+)
+
+INDEXES = [
+    (vehicles_col, [
+        IndexModel([("vin", ASCENDING)], unique=True),
+        # Keyset pagination of /vehicles by vin or by (price, vin)
+        IndexModel([("status", ASCENDING), ("vin", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("price", ASCENDING), ("vin", ASCENDING)]),
+    ]),
+    (sync_logs_col, [
+        IndexModel([("timestamp", DESCENDING)]),
+    ]),
+    (ml_metrics_col, [
+        IndexModel([("trained_at", DESCENDING)]),
+    ]),
+    (vehicle_history_col, [
+        IndexModel([("vin", ASCENDING), ("ts", DESCENDING)]),
+        IndexModel([("price_dropped", ASCENDING), ("ts", DESCENDING)]),
+    ]),
+    (report_snapshots_col, [
+        IndexModel([("created_at", DESCENDING)]),
+    ]),
+]
+
+
+def ensure_indexes():
+    """Create every index the API relies on. Safe to run on each startup."""
+    for col, models in INDEXES:
+        col.create_indexes(models)
+
+
+def api_queries():
+    """(name, collection, filter, sort) for every query the hot paths run."""
+    week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+    return [
+        ("GET /vehicles", vehicles_col, {"status": "active"}, [("vin", 1)]),
+        ("GET /vehicles?after=", vehicles_col,
+         {"status": "active", "vin": {"$gt": "CHECK"}}, [("vin", 1)]),
+        ("GET /vehicles?sort=price&after=", vehicles_col,
+         {"status": "active", "$or": [{"price": {"$gt": 0}}, {"price": 0, "vin": {"$gt": "CHECK"}}]},
+         [("price", 1), ("vin", 1)]),
+        ("GET /vehicles/{vin}/predict", vehicles_col, {"vin": "CHECK"}, None),
+        ("GET /report vehicles", vehicles_col, {"status": "active"}, [("price", 1)]),
+        ("GET /sync-status", sync_logs_col, {}, [("timestamp", -1)]),
+        ("GET /report ml metrics", ml_metrics_col, {}, [("trained_at", -1)]),
+        ("GET /vehicles/{vin}/history", vehicle_history_col, {"vin": "CHECK"}, [("ts", -1)]),
+        ("GET /price-drops", vehicle_history_col,
+         {"price_dropped": True, "ts": {"$gte": week_ago}}, [("ts", -1)]),
+        ("GET /report snapshot", report_snapshots_col, {}, [("created_at", -1)]),
+        ("sync stored hashes", vehicles_col, {"vin": {"$in": ["CHECK"]}}, None),
+    ]
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def check_query_plans():
+    """explain() each API query; return the names of those that COLLSCAN."""
+    failures = []
+
+    for name, col, query, sort in api_queries():
+        cursor = col.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        winning = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = set(_stages(winning))
+        status = "❌ COLLSCAN" if "COLLSCAN" in stages else "✅ " + ", ".join(sorted(stages))
+        print(f"{name:<32} {status}")
+
+        if "COLLSCAN" in stages:
+            failures.append(name)
+
+    return failures
+
+
+if __name__ == "__main__":
+    ensure_indexes()
+    print("✅ Indexes ensured")
+
+    if "--check" in sys.argv:
+        if check_query_plans():
+            sys.exit(1)
@@ -1,19 +1,227 @@
 # db/mongo.py
 import os
-from pymongo import MongoClient
+import threading
+from pymongo import AsyncMongoClient, MongoClient, monitoring
 
-MONGO_URI = os.getenv("MONGO_URI")
-if not MONGO_URI:
-    raise RuntimeError("MONGO_URI not set")
+# Pool / client settings, read when the first client is created
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
 
-client = MongoClient(MONGO_URI)
+# "default" serves writes and batch jobs; "read" serves API read endpoints
+ROLES = {
+    "default": {"readPreference": "primary"},
+    "read": {"readPreference": MONGO_READ_PREFERENCE},
+}
 
-# ✅ Use database from URI (no DB_NAME needed)
-db = client.get_default_database()
+_clients = {}
+_async_clients = {}
+_listeners = {}
+_pid = None
+_lock = threading.Lock()
 
-vehicles_col = db["vehicles"]
-sync_logs_col = db["sync_logs"]
-ml_metrics_col = db["ml_metrics"]
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts checked-out connections and checkout wait time for one client."""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.connections_open = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "connections_open": self.connections_open,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "avg_wait_ms": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_ms_max, 3)
+        }
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.checkouts += 1
+        self.max_checked_out = max(self.max_checked_out, self.checked_out)
+        # `duration` (seconds) exists on pymongo >= 4.7
+        wait_ms = getattr(event, "duration", 0.0) * 1000
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_created(self, event):
+        self.connections_open += 1
+
+    def connection_closed(self, event):
+        self.connections_open -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def get_client(role: str = "default") -> MongoClient:
+    """
+    Lazily create one MongoClient per role and per process (clients must
+    not be shared across a fork, e.g. uvicorn / process-pool workers).
+    """
+    with _lock:
+        _reset_after_fork()
+
+        if role not in _clients:
+            _clients[role] = _new_client(MongoClient, role, role)
+
+        return _clients[role]
+
+
+def get_async_client(role: str = "read") -> AsyncMongoClient:
+    """
+    AsyncMongoClient for the API's async endpoints. It belongs to the
+    event loop it is first used on: create it in the app lifespan and
+    close it with close_async_clients() on the same loop.
+    """
+    with _lock:
+        _reset_after_fork()
+
+        if role not in _async_clients:
+            _async_clients[role] = _new_client(AsyncMongoClient, role, f"async-{role}")
+
+        return _async_clients[role]
+
+
+def _reset_after_fork():
+    global _pid
+    if _pid != os.getpid():
+        _clients.clear()
+        _async_clients.clear()
+        _listeners.clear()
+        _pid = os.getpid()
+
+
+def _new_client(client_class, role: str, stats_key: str):
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        raise RuntimeError("MONGO_URI not set")
+
+    listener = PoolStatsListener()
+    client = client_class(
+        uri,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        event_listeners=[listener],
+        **ROLES[role]
+    )
+    _listeners[stats_key] = listener
+    return client
+
+
+def get_db(role: str = "default"):
+    # ✅ Use database from URI (no DB_NAME needed)
+    return get_client(role).get_default_database()
+
+
+def get_async_db(role: str = "read"):
+    return get_async_client(role).get_default_database()
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        for role in list(_listeners):
+            if not role.startswith("async-"):
+                del _listeners[role]
+
+
+async def close_async_clients():
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+        for role in list(_listeners):
+            if role.startswith("async-"):
+                del _listeners[role]
+
+    for client in clients:
+        await client.close()
+
+
+def pool_stats() -> dict:
+    return {role: listener.stats() for role, listener in _listeners.items()}
+
+
+class LazyCollection:
+    """
+    Module-level handle that resolves the real collection on each use,
+    so importing this module never needs MONGO_URI or a live server.
+    """
+
+    def __init__(self, name: str, role: str = "default"):
+        self.name = name
+        self.role = role
+
+    def get(self):
+        return get_db(self.role)[self.name]
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, role={self.role!r})"
+
+
+class AsyncLazyCollection(LazyCollection):
+    """Same as LazyCollection, on the async client (methods are awaitable)."""
+
+    def get(self):
+        return get_async_db(self.role)[self.name]
+
+
+vehicles_col = LazyCollection("vehicles")
+sync_logs_col = LazyCollection("sync_logs")
+ml_metrics_col = LazyCollection("ml_metrics")
+vehicle_history_col = LazyCollection("vehicle_history")
+jobs_col = LazyCollection("jobs")
+locks_col = LazyCollection("locks")
+report_snapshots_col = LazyCollection("report_snapshots")
+
+# Read endpoints: secondaryPreferred by default
+vehicles_read_col = LazyCollection("vehicles", role="read")
+sync_logs_read_col = LazyCollection("sync_logs", role="read")
+ml_metrics_read_col = LazyCollection("ml_metrics", role="read")
+vehicle_history_read_col = LazyCollection("vehicle_history", role="read")
+
+# Async endpoints (same read preference)
+vehicles_async_col = AsyncLazyCollection("vehicles", role="read")
+sync_logs_async_col = AsyncLazyCollection("sync_logs", role="read")
+# Primary: the snapshot marker and its body must come from the same node
+report_snapshots_async_col = AsyncLazyCollection("report_snapshots", role="default")
  
  
 # import os
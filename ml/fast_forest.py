@@ -0,0 +1,81 @@
+# ml/fast_forest.py
+import numpy as np
+
+# Rows evaluated per step; bounds the (rows x trees) node-index matrix
+CHUNK_ROWS = 4096
+# Largest |flat - sklearn| difference accepted by check_matches()
+PARITY_ATOL = 1e-6
+
+
+class FlatForest:
+    """
+    A fitted sklearn forest regressor flattened into five NumPy arrays.
+
+    All trees' nodes are concatenated; prediction walks every (row, tree)
+    pair one level per step with vectorized indexing, so the cost is
+    depth x a few array ops instead of sklearn's per-tree dispatch.
+    Pickles as plain arrays, which joblib can memory-map.
+    """
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        def shifted(children, offset):
+            return np.where(children == -1, -1, children + offset)
+
+        self.left = np.concatenate(
+            [shifted(t.children_left, o) for t, o in zip(trees, offsets)]
+        ).astype(np.int32)
+        self.right = np.concatenate(
+            [shifted(t.children_right, o) for t, o in zip(trees, offsets)]
+        ).astype(np.int32)
+        # Leaves carry feature -2; clamp so they can still be indexed
+        self.feature = np.maximum(
+            np.concatenate([t.feature for t in trees]), 0
+        ).astype(np.int32)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        self.value = np.concatenate([t.value[:, 0, 0] for t in trees])
+        self.roots = offsets.astype(np.int32)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.n_features_in_ = forest.n_features_in_
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.left)
+
+    def _predict_chunk(self, X):
+        nodes = np.tile(self.roots, (len(X), 1))
+        rows = np.arange(len(X))[:, None]
+
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(
+                is_leaf, nodes, np.where(go_left, left, self.right[nodes])
+            )
+
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X):
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if len(X) <= CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([
+            self._predict_chunk(X[i:i + CHUNK_ROWS])
+            for i in range(0, len(X), CHUNK_ROWS)
+        ])
+
+    def check_matches(self, forest, X, atol: float = PARITY_ATOL):
+        """Raise ValueError unless predict(X) equals forest.predict(X)."""
+        expected = forest.predict(X)
+        actual = self.predict(X)
+        if not np.allclose(actual, expected, rtol=0, atol=atol):
+            worst = float(np.max(np.abs(actual - expected)))
+            raise ValueError(f"FlatForest disagrees with sklearn (max abs diff {worst:.6g})")
+        return self
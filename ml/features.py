@@ -0,0 +1,156 @@
+# ml/features.py
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Vehicle fields the features are built from; a row needs the first two
+RAW_FIELDS = ["year", "mileage_km", "title", "trim"]
+REQUIRED_FIELDS = ["year", "mileage_km"]
+
+CATEGORICAL = ["model_family", "body_style", "trim_level"]
+FEATURE_NAMES = ["year", "mileage_km", "age", "km_per_year", *CATEGORICAL, "s_line"]
+
+MAKE_RE = re.compile(r"^\s*(?:19|20)\d{2}\s+|\baudi\b", re.IGNORECASE)
+TRIM_LEVELS = ["vorsprung", "prestige", "premium plus", "premium",
+               "technik", "progressiv", "komfort"]
+S_LINE_RE = re.compile(r"\bs[\s-]?line\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def parse_title(title: str):
+    """
+    ("Q5", "suv") from "2021 Audi Q5". Titles repeat across thousands
+    of listings, so each distinct string is parsed once per process.
+    """
+    tokens = MAKE_RE.sub(" ", title or "").split()
+    if not tokens:
+        return "", ""
+
+    family = tokens[0].upper()
+    rest = [t.lower() for t in tokens[1:]]
+    # "RS 5" / "S 4" are written both ways; "e-tron GT" is its own family
+    if family in ("RS", "S") and rest and rest[0][:1].isdigit():
+        family += rest.pop(0)
+    elif family == "E-TRON" and rest and rest[0] == "gt":
+        family += " GT"
+        rest.pop(0)
+
+    if "sportback" in rest:
+        body = "sportback"
+    elif "avant" in rest or "allroad" in rest:
+        body = "wagon"
+    elif "cabriolet" in rest or "cabrio" in rest:
+        body = "convertible"
+    elif "coupe" in rest or "coupé" in rest or family in ("TT", "R8"):
+        body = "coupe"
+    elif family.startswith(("Q", "SQ", "RSQ", "E-TRON")) and family != "E-TRON GT":
+        body = "suv"
+    else:
+        body = "sedan"
+    return family, body
+
+
+@lru_cache(maxsize=1024)
+def parse_trim(trim: str):
+    """("progressiv", True) from "Progressiv S line"."""
+    lower = (trim or "").lower()
+    level = next((t for t in TRIM_LEVELS if t in lower), "other" if lower.strip() else "")
+    return level, bool(S_LINE_RE.search(lower))
+
+
+def _parse_column(values, parse) -> tuple:
+    """
+    Parse each distinct string once and broadcast back to the rows:
+    returns (row -> distinct index, list of parsed tuples).
+    """
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        # Training frames arrive already dictionary-encoded
+        codes = values.cat.codes.to_numpy()
+        uniques = list(values.cat.categories)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(uniques), codes)
+            uniques.append("")
+    else:
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""), sort=False)
+    return codes, [parse(str(u)) for u in uniques]
+
+
+def to_frame(vehicles) -> pd.DataFrame:
+    """Raw feature columns for a list of vehicle dicts (missing keys -> NaN)."""
+    return pd.DataFrame.from_records(list(vehicles), columns=RAW_FIELDS)
+
+
+class FeatureEncoder:
+    """
+    Turns raw vehicle columns into the model's float32 matrix.
+
+    fit() learns the category vocabularies and the reference year for
+    `age`; both are pickled inside the model artifact so serving encodes
+    exactly like training did. Unknown categories encode as -1.
+    """
+
+    def __init__(self):
+        self.categories = {}
+        self.fitted_at = None
+
+    def _parsed(self, frame: pd.DataFrame) -> dict:
+        title_codes, titles = _parse_column(frame["title"], parse_title)
+        trim_codes, trims = _parse_column(frame["trim"], parse_trim)
+        return {
+            "model_family": (title_codes, [t[0] for t in titles]),
+            "body_style": (title_codes, [t[1] for t in titles]),
+            "trim_level": (trim_codes, [t[0] for t in trims]),
+            "s_line": (trim_codes, [t[1] for t in trims]),
+        }
+
+    def fit(self, frame: pd.DataFrame):
+        parsed = self._parsed(frame)
+        self.categories = {
+            name: sorted(set(parsed[name][1]) - {""}) for name in CATEGORICAL
+        }
+        self.fitted_at = datetime.now(timezone.utc)
+        return self
+
+    @property
+    def reference_year(self) -> int:
+        """Year `age` is counted from: the fit date, never the serving date."""
+        return (self.fitted_at or datetime.now(timezone.utc)).year
+
+    def transform(self, frame: pd.DataFrame):
+        """
+        (X float32 [n, len(FEATURE_NAMES)], valid bool [n]). Rows missing
+        a required field are zero-filled in X and flagged False.
+        """
+        n = len(frame)
+        year = pd.to_numeric(frame["year"], errors="coerce").to_numpy(dtype=float)
+        mileage = pd.to_numeric(frame["mileage_km"], errors="coerce").to_numpy(dtype=float)
+        valid = ~(np.isnan(year) | np.isnan(mileage))
+
+        X = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float32)
+        if not n:
+            return X, valid
+
+        year = np.where(valid, year, 0)
+        mileage = np.where(valid, mileage, 0)
+        age = np.clip(self.reference_year - year, 0, None)
+
+        X[:, 0] = year
+        X[:, 1] = mileage
+        X[:, 2] = age
+        X[:, 3] = mileage / np.maximum(age, 1)
+
+        parsed = self._parsed(frame)
+        for j, name in enumerate(CATEGORICAL, start=4):
+            codes, values = parsed[name]
+            lookup = {c: i for i, c in enumerate(self.categories.get(name, []))}
+            encoded = np.array([lookup.get(v, -1) for v in values], dtype=np.float32)
+            X[:, j] = encoded[codes]
+
+        codes, flags = parsed["s_line"]
+        X[:, -1] = np.array(flags, dtype=np.float32)[codes]
+
+        X[~valid] = 0
+        return X, valid
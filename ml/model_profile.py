@@ -0,0 +1,53 @@
+# ml/model_profile.py
+import os
+import time
+
+import numpy as np
+import psutil
+from joblib import load
+
+
+def _percentiles_ms(samples):
+    ms = np.array(samples) * 1000
+    return round(float(np.percentile(ms, 50)), 3), round(float(np.percentile(ms, 99)), 3)
+
+
+def profile_artifact(path: str, X, single_runs: int = 200, batch_runs: int = 20) -> dict:
+    """
+    Cold-load a published artifact and measure what serving it costs:
+    file size, load time, RSS delta, p50/p99 single-row and batch latency.
+    """
+    X = np.asarray(X, dtype=float)
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    start = time.perf_counter()
+    artifact = load(path, mmap_mode="r")
+    load_s = time.perf_counter() - start
+    model = artifact["model"] if isinstance(artifact, dict) else artifact
+
+    single = []
+    for i in range(min(single_runs, len(X))):
+        start = time.perf_counter()
+        model.predict(X[i:i + 1])
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for _ in range(batch_runs):
+        start = time.perf_counter()
+        model.predict(X)
+        batch.append(time.perf_counter() - start)
+
+    single_p50, single_p99 = _percentiles_ms(single)
+    batch_p50, batch_p99 = _percentiles_ms(batch)
+
+    return {
+        "file_size_kb": round(os.path.getsize(path) / 1024, 1),
+        "load_ms": round(load_s * 1000, 2),
+        "rss_delta_mb": round((process.memory_info().rss - rss_before) / (1024 * 1024), 2),
+        "single_p50_ms": single_p50,
+        "single_p99_ms": single_p99,
+        "batch_rows": len(X),
+        "batch_p50_ms": batch_p50,
+        "batch_p99_ms": batch_p99
+    }
@@ -0,0 +1,94 @@
+# ml/model_store.py
+"""
+Atomic model publishing.
+
+Each trained model is written to ml/models/model-<version>.joblib through
+a temp file + fsync + rename, then the CURRENT pointer file is swapped the
+same way. Readers never see a half-written artifact, and can detect a new
+model with a single stat() of the pointer.
+"""
+import os
+import tempfile
+
+from joblib import dump
+
+MODEL_DIR = os.getenv("MODEL_DIR", "ml/models")
+POINTER_PATH = os.path.join(MODEL_DIR, "CURRENT")
+LEGACY_MODEL_PATH = "ml/model.joblib"
+KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+
+
+def _fsync_dir(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, write):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def model_path(version: str) -> str:
+    return os.path.join(MODEL_DIR, f"model-{version}.joblib")
+
+
+def publish_model(artifact: dict, version: str, compress=0) -> str:
+    """Write the artifact under its version and point CURRENT at it."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = model_path(version)
+
+    # Uncompressed artifacts can be memory-mapped by every worker
+    _atomic_write(path, lambda f: dump(artifact, f, compress=compress))
+    _atomic_write(POINTER_PATH, lambda f: f.write(os.path.basename(path).encode()))
+
+    _prune_old_versions(keep=os.path.basename(path))
+    return path
+
+
+def _prune_old_versions(keep: str):
+    files = sorted(
+        (f for f in os.listdir(MODEL_DIR) if f.startswith("model-") and f.endswith(".joblib")),
+        key=lambda f: os.path.getmtime(os.path.join(MODEL_DIR, f)),
+        reverse=True
+    )
+    # Unlinking is safe for workers that still have an old file mapped
+    for name in files[KEEP_VERSIONS:]:
+        if name != keep:
+            os.remove(os.path.join(MODEL_DIR, name))
+
+
+def pointer_mtime():
+    """Cheap change check: mtime of CURRENT, or of the legacy file, or None."""
+    for path in (POINTER_PATH, LEGACY_MODEL_PATH):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def current_model_path():
+    """Path of the published model (legacy ml/model.joblib as a fallback)."""
+    try:
+        with open(POINTER_PATH, encoding="utf-8") as f:
+            return os.path.join(MODEL_DIR, f.read().strip())
+    except FileNotFoundError:
+        pass
+
+    if os.path.exists(LEGACY_MODEL_PATH):
+        return LEGACY_MODEL_PATH
+    raise FileNotFoundError("ML model not trained yet")
@@ -0,0 +1,53 @@
+# ml/precompute.py
+import numpy as np
+from pymongo import UpdateOne
+
+from db.mongo import vehicles_col
+from ml.features import RAW_FIELDS
+from ml.predict import predict_prices, served_model
+
+BATCH_SIZE = 1000
+
+
+def refresh_predictions(model=None, version=None, col=None, batch_size: int = BATCH_SIZE,
+                        encoder=None):
+    """
+    Store predicted_price / model_version on every active vehicle whose
+    stored prediction was not made by `version` (default: the served model).
+    After a sync this only touches new or changed cars; after training, all.
+    """
+    col = col if col is not None else vehicles_col
+    if model is None:
+        # One state read: a publish in between cannot mix model and version
+        model, version, encoder = served_model()
+
+    query = {"status": "active"}
+    if version is not None:
+        query["model_version"] = {"$ne": version}
+    # else: a legacy artifact has no version to tell stored predictions
+    # apart ($ne: None would also skip cars with no model_version): redo all
+
+    vehicles = list(col.find(
+        query,
+        {"_id": 0, "vin": 1, **{f: 1 for f in RAW_FIELDS}}
+    ))
+    if not vehicles:
+        return 0
+
+    preds = predict_prices(vehicles, model=model, encoder=encoder)
+
+    ops = [
+        UpdateOne(
+            {"vin": v["vin"]},
+            {"$set": {
+                "predicted_price": None if np.isnan(p) else float(p),
+                "model_version": version
+            }}
+        )
+        for v, p in zip(vehicles, preds)
+    ]
+    for i in range(0, len(ops), batch_size):
+        col.bulk_write(ops[i:i + batch_size], ordered=False)
+
+    print(f"🧮 Stored predictions for {len(ops)} vehicles (model {version})")
+    return len(ops)
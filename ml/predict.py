@@ -1,28 +1,146 @@
 # ml/predict.py
 import os
+import threading
 import pandas as pd
+import psutil
 import numpy as np
 from joblib import load
+from ml import model_store
+from ml.features import REQUIRED_FIELDS, to_frame
 
-MODEL_PATH = "ml/model.joblib"
-_model = None
+FEATURES = REQUIRED_FIELDS
+
+# (model, version, pointer mtime, encoder) — swapped as one reference, never mutated
+_state = None
+_load_lock = threading.Lock()
+
+
+def _current_state():
+    """
+    Return the served (model, version, mtime, encoder), reloading when the published
+    pointer changed. Requests already holding the old model keep using
+    it; only the thread that notices the change pays for the load.
+    """
+    global _state
+    mtime = model_store.pointer_mtime()
+    state = _state
+
+    if state is not None and state[2] == mtime:
+        return state
+    if mtime is None:
+        raise FileNotFoundError("ML model not trained yet")
+
+    with _load_lock:
+        if _state is not None and _state[2] == mtime:
+            return _state
+
+        # Memory-mapped: a FlatForest (the default artifact) stays shared between
+        # uvicorn workers; a MODEL_FLATTEN=0 sklearn forest copies its nodes on
+        # unpickle, one copy per worker. Logged per worker to keep that visible.
+        rss_before = psutil.Process().memory_info().rss
+        artifact = load(model_store.current_model_path(), mmap_mode="r")
+        rss_mb = (psutil.Process().memory_info().rss - rss_before) / (1024 * 1024)
+        print(f"🧠 Model loaded in pid {os.getpid()} (+{rss_mb:.1f} MB RSS)")
+
+        # Artifacts are {"model", "version", "encoder", ...}; older ones are a
+        # bare estimator, or carry no encoder (year / mileage only)
+        if isinstance(artifact, dict):
+            _state = (artifact["model"], artifact.get("version"), mtime, artifact.get("encoder"))
+        else:
+            _state = (artifact, None, mtime, None)
+        return _state
 
 
 def get_model():
-    global _model
-    if _model is None:
-        if not os.path.exists(MODEL_PATH):
-            raise RuntimeError("ML model not trained yet")
-        _model = load(MODEL_PATH)
-    return _model
+    return _current_state()[0]
+
+
+def get_model_version():
+    """Version id of the model this process serves (None for legacy files)."""
+    return _current_state()[1]
+
+
+def get_encoder():
+    """FeatureEncoder bundled with the served model (None for older artifacts)."""
+    return _current_state()[3]
+
+
+def served_model():
+    """(model, version, encoder) from a single state read."""
+    model, version, _, encoder = _current_state()
+    return model, version, encoder
+
+
+def feature_matrix(frame: pd.DataFrame, encoder=None):
+    """
+    (X, valid) for a frame of raw vehicle columns. Rows missing a feature
+    are zero-filled in X and flagged False in `valid`. Without an encoder
+    the matrix is the legacy [year, mileage_km].
+    """
+    if encoder is not None:
+        return encoder.transform(frame)
+
+    # A copy: to_numpy() may return a read-only view (pandas 3 copy-on-write)
+    X = np.array(frame[FEATURES].apply(pd.to_numeric, errors="coerce"), dtype=float)
+    valid = ~np.isnan(X).any(axis=1)
+    X[~valid] = 0
+    return X, valid
+
+
+def predict_frame(frame: pd.DataFrame, model=None, encoder=None) -> np.ndarray:
+    """
+    Predict every row with a single model.predict call.
+    Rows with missing features come back as NaN. An explicit `model`
+    is used with the `encoder` passed alongside it.
+    """
+    preds = np.full(len(frame), np.nan)
+    if not len(frame):
+        return preds
+
+    if model is None:
+        model, _, encoder = served_model()
+
+    X, valid = feature_matrix(frame, encoder)
+    if valid.any():
+        preds[valid] = model.predict(X[valid])
+    return preds
+
+
+def predict_prices(vehicles, model=None, encoder=None) -> np.ndarray:
+    """predict_frame() for a list of vehicle dicts."""
+    return predict_frame(to_frame(vehicles), model=model, encoder=encoder)
 
 
 def predict_price(vehicle: dict) -> float:
-    model = get_model()
+    predicted = predict_prices([vehicle])[0]
+    if np.isnan(predicted):
+        raise ValueError(f"Missing features for prediction: {FEATURES}")
+    return float(predicted)
+
+
+def cached_or_live_prices(vehicles, served=None) -> np.ndarray:
+    """
+    Use the predicted_price stored on each vehicle when it was computed
+    by the model this process serves; batch-predict only the rest.
+    `served` is a (model, version, encoder) the caller already read.
+    """
+    # One state read so the stored/live split uses a single model
+    model, version, encoder = served if served is not None else served_model()
+    preds = np.full(len(vehicles), np.nan)
+    stale = []
 
-    X = np.array([[
-        vehicle["year"],
-        vehicle["mileage_km"]
-    ]])
+    for i, v in enumerate(vehicles):
+        if (
+            version is not None
+            and v.get("model_version") == version
+            and v.get("predicted_price") is not None
+        ):
+            preds[i] = v["predicted_price"]
+        else:
+            stale.append(i)
 
-    return float(model.predict(X)[0])
\ No newline at end of file
+    if stale:
+        preds[stale] = predict_prices(
+            [vehicles[i] for i in stale], model=model, encoder=encoder
+        )
+    return preds
@@ -0,0 +1,133 @@
+# ml/search.py
+"""
+Holdout evaluation and a small randomized hyperparameter search.
+
+Candidates are evaluated in parallel (one single-threaded fit per core)
+in rounds; no new round starts once the wall-time budget is spent.
+"""
+import os
+import random
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+
+# kfold: shuffled K-fold | time: train on older listings, test on the newest
+TRAIN_EVAL = os.getenv("TRAIN_EVAL", "kfold")
+TRAIN_CV_FOLDS = int(os.getenv("TRAIN_CV_FOLDS", "5"))
+TIME_HOLDOUT_FRACTION = 0.2
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "12"))
+SEARCH_BUDGET_S = float(os.getenv("SEARCH_BUDGET_S", "300"))
+SEARCH_N_JOBS = int(os.getenv("SEARCH_N_JOBS", "-1"))
+
+SEARCH_SPACE = {
+    "rf": {
+        "n_estimators": [100, 200, 300],
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.5],
+    },
+    "rf_compact": {
+        "n_estimators": [50, 100, 150],
+        "max_depth": [6, 8, 10, 12],
+        "min_samples_leaf": [2, 3, 5, 8],
+    },
+    "hgb": {
+        "max_iter": [100, 200, 400],
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [5, 10, 20],
+    },
+}
+
+
+def holdout_splits(n: int, mode: str = TRAIN_EVAL, folds: int = TRAIN_CV_FOLDS):
+    """
+    (train_idx, test_idx) pairs. Rows are ordered oldest first (see
+    ml.dataset), so "time" tests on the most recent listings.
+    """
+    if mode == "time":
+        cut = int(n * (1 - TIME_HOLDOUT_FRACTION))
+        return [(np.arange(cut), np.arange(cut, n))]
+    if mode == "kfold":
+        return list(KFold(n_splits=folds, shuffle=True, random_state=42).split(np.arange(n)))
+    raise ValueError(f"Unknown evaluation mode: {mode}")
+
+
+def random_candidates(kind: str, n: int, defaults: dict, seed: int = 42):
+    """The default configuration first, then up to n-1 distinct random ones."""
+    rng = random.Random(seed)
+    space = SEARCH_SPACE[kind]
+    candidates = [dict(defaults)]
+    seen = {tuple(sorted(defaults.items(), key=lambda kv: kv[0]))}
+
+    for _ in range(n * 20):
+        if len(candidates) >= n:
+            break
+        params = {**defaults, **{k: rng.choice(v) for k, v in space.items()}}
+        key = tuple(sorted(params.items(), key=lambda kv: kv[0]))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+
+    return candidates
+
+
+def evaluate_candidate(build, params: dict, X, y, splits) -> dict:
+    """Mean holdout error, fit time and per-row predict time over the splits."""
+    maes, rmses, r2s, fit_s, predict_s, rows = [], [], [], 0.0, 0.0, 0
+
+    for train_idx, test_idx in splits:
+        model = build(**params)
+
+        start = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        fit_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        preds = model.predict(X[test_idx])
+        predict_s += time.perf_counter() - start
+        rows += len(test_idx)
+
+        maes.append(mean_absolute_error(y[test_idx], preds))
+        rmses.append(float(np.sqrt(mean_squared_error(y[test_idx], preds))))
+        r2s.append(r2_score(y[test_idx], preds))
+
+    return {
+        "params": params,
+        "mae": float(np.mean(maes)),
+        "rmse": float(np.mean(rmses)),
+        "r2": float(np.mean(r2s)),
+        "fit_s": round(fit_s / len(splits), 4),
+        "predict_us_per_row": round(predict_s / max(rows, 1) * 1e6, 3)
+    }
+
+
+def search(build, kind: str, defaults: dict, X, y,
+           n_candidates: int = SEARCH_CANDIDATES, n_jobs: int = SEARCH_N_JOBS,
+           budget_s: float = SEARCH_BUDGET_S, mode: str = TRAIN_EVAL):
+    """
+    Evaluate candidates in parallel rounds within the wall-time budget.
+    `build(**params)` must return a single-threaded estimator.
+    Returns the results table sorted by holdout MAE (best first).
+    """
+    splits = holdout_splits(len(y), mode)
+    candidates = random_candidates(kind, n_candidates, defaults)
+    workers = os.cpu_count() if n_jobs in (-1, None) else max(n_jobs, 1)
+
+    results = []
+    deadline = time.monotonic() + budget_s
+
+    with Parallel(n_jobs=workers) as parallel:
+        for i in range(0, len(candidates), workers):
+            if results and time.monotonic() > deadline:
+                print(f"⏱️ Search budget spent after {len(results)} candidates")
+                break
+            results += parallel(
+                delayed(evaluate_candidate)(build, params, X, y, splits)
+                for params in candidates[i:i + workers]
+            )
+
+    return sorted(results, key=lambda r: r["mae"])
@@ -1,34 +1,211 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
-from joblib import dump
-from db.mongo import vehicles_col, ml_metrics_col
+import os
+from functools import partial
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from db.mongo import ml_metrics_col
 from datetime import datetime, timezone
+from ml.features import FEATURE_NAMES, FeatureEncoder
+from ml.dataset import load_training_data
+from ml.fast_forest import FlatForest
+from ml.model_store import publish_model, pointer_mtime
+from ml.model_profile import profile_artifact
+from ml.precompute import refresh_predictions
+from ml.search import TRAIN_EVAL, TRAIN_CV_FOLDS, evaluate_candidate, holdout_splits, search
 
-def train_model():
-    data = list(vehicles_col.find({"status": "active"}))
-    df = pd.DataFrame(data)
+# rf: full forest | rf_compact: depth/leaf-limited forest | hgb: histogram GBM
+MODEL_KIND = os.getenv("MODEL_KIND", "rf")
+# Serve forests through the flattened NumPy evaluator: its plain arrays stay
+# memory-mapped and shared by every uvicorn worker (checked against sklearn
+# before publishing). 0 serves the sklearn forest, one copy per worker.
+MODEL_FLATTEN = os.getenv("MODEL_FLATTEN", "1") == "1"
+# joblib compression level (0 keeps the artifact memory-mappable)
+MODEL_COMPRESS = int(os.getenv("MODEL_COMPRESS", "0"))
+# Train on historic (inactive) listings too, optionally only those seen recently
+TRAIN_INCLUDE_INACTIVE = os.getenv("TRAIN_INCLUDE_INACTIVE", "0") == "1"
+TRAIN_SINCE_DAYS = float(os.getenv("TRAIN_SINCE_DAYS")) if os.getenv("TRAIN_SINCE_DAYS") else None
+# Cores used to fit forests (-1 = all)
+TRAIN_N_JOBS = int(os.getenv("TRAIN_N_JOBS", "1"))
+# Retrain only when the training set moved at least this much (relative)
+RETRAIN_DRIFT_THRESHOLD = float(os.getenv("RETRAIN_DRIFT_THRESHOLD", "0.02"))
+# Randomized hyperparameter search before the final fit
+TRAIN_SEARCH = os.getenv("TRAIN_SEARCH", "0") == "1"
 
-    df = df.dropna(subset=["price", "mileage_km"])
-    X = df[["year", "mileage_km"]].fillna(0)
-    y = df["price"]
+MODEL_NAMES = {
+    "rf": "RandomForest",
+    "rf_compact": "RandomForest (compact)",
+    "hgb": "HistGradientBoosting",
+}
 
-    model = RandomForestRegressor(n_estimators=200, random_state=42)
+
+DEFAULT_PARAMS = {
+    "rf": {"n_estimators": 200},
+    "rf_compact": {"n_estimators": 100, "max_depth": 12, "min_samples_leaf": 3},
+    "hgb": {"max_iter": 200},
+}
+
+
+def build_estimator(kind: str, n_jobs: int = TRAIN_N_JOBS, **params):
+    """Estimator for `kind`; `params` override its default hyperparameters."""
+    if kind not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown model kind: {kind}")
+    params = {**DEFAULT_PARAMS[kind], **params}
+
+    if kind == "hgb":
+        return HistGradientBoostingRegressor(random_state=42, **params)
+    return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+
+
+def new_model_version(kind: str, trained_at: datetime) -> str:
+    return f"{kind}-" + trained_at.strftime("%Y%m%d%H%M%S")
+
+
+def train_model(kind: str = MODEL_KIND, flatten: bool = MODEL_FLATTEN,
+                compress: int = MODEL_COMPRESS,
+                include_inactive: bool = TRAIN_INCLUDE_INACTIVE,
+                since_days: float = TRAIN_SINCE_DAYS,
+                n_jobs: int = TRAIN_N_JOBS, data=None,
+                run_search: bool = TRAIN_SEARCH, evaluation: str = TRAIN_EVAL):
+    """
+    Evaluate on held-out rows (K-fold or newest listings), optionally pick
+    hyperparameters by randomized search, then fit the winner on all rows.
+    `data` is an already loaded (frame, y, stats) from load_training_data.
+    """
+    if data is None:
+        data = load_training_data(include_inactive, since_days)
+    frame, y, data_stats = data
+
+    # Vocabularies fitted once on all rows and shipped with the model
+    encoder = FeatureEncoder().fit(frame)
+    X, _ = encoder.transform(frame)
+
+    if len(y) < 2 * TRAIN_CV_FOLDS:
+        raise ValueError(f"Not enough rows to evaluate a model ({len(y)})")
+
+    if run_search:
+        results = search(
+            partial(build_estimator, kind, 1), kind, DEFAULT_PARAMS[kind],
+            X, y, mode=evaluation
+        )
+    else:
+        results = [evaluate_candidate(
+            partial(build_estimator, kind, n_jobs), DEFAULT_PARAMS[kind],
+            X, y, holdout_splits(len(y), evaluation)
+        )]
+    best = results[0]
+    print(f"🏁 Holdout ({evaluation}) MAE {best['mae']:.0f}, R² {best['r2']:.3f}")
+
+    model = build_estimator(kind, n_jobs, **best["params"])
     model.fit(X, y)
-    
-    preds = model.predict(X)
+    if kind != "hgb":
+        # Serving predicts a few rows at a time: no thread fan-out there
+        model.set_params(n_jobs=1)
+
+    served = model
+    if flatten and kind != "hgb":
+        # Never publish a hand-written evaluator that disagrees with sklearn
+        served = FlatForest(model).check_matches(model, X)
+
+    trained_at = datetime.now(timezone.utc)
+    version = new_model_version(kind, trained_at)
+
+    path = publish_model({
+        "model": served,
+        "version": version,
+        "features": FEATURE_NAMES,
+        "encoder": encoder,
+        "trained_at": trained_at
+    }, version, compress=compress)
 
-    mae = mean_absolute_error(y, preds)
-    r2 = r2_score(y, preds)
+    inference = profile_artifact(path, X[:1000])
+    print(f"📏 Inference profile: {inference}")
+
+    ml_metrics_col.insert_one({
+        "model": MODEL_NAMES[kind],
+        "model_version": version,
+        "flattened": served is not model,
+        "features": FEATURE_NAMES,
+        "categories": encoder.categories,
+        "params": best["params"],
+        "evaluation": evaluation,
+        "mae": best["mae"],
+        "rmse": best["rmse"],
+        "r2": best["r2"],
+        "search": results if run_search else None,
+        "inference": inference,
+        "data": data_stats,
+        "trained_at": trained_at
+    })
+
+    refresh_predictions(model=served, version=version, encoder=encoder)
+    return version
+
+
+def _relative_change(current, previous):
+    if current is None or not previous:
+        return 0.0
+    return abs(current - previous) / abs(previous)
+
+
+def dataset_drift(current: dict, previous: dict) -> float:
+    """Largest relative change in row count, mean price or a feature mean."""
+    changes = [
+        _relative_change(current["rows"], previous.get("rows")),
+        _relative_change(current.get("price_mean"), previous.get("price_mean")),
+    ]
+    previous_means = previous.get("feature_means") or {}
+    for f, mean in (current.get("feature_means") or {}).items():
+        changes.append(_relative_change(mean, previous_means.get(f)))
+    return max(changes)
 
-    dump(model, "ml/model.joblib")
 
+def _record_skip(reason: str, sync_counts, data_stats=None, drift=None):
+    print(f"⏭️ Skipping retraining: {reason}")
     ml_metrics_col.insert_one({
-        "model": "RandomForest",
-        "mae": mae,
-        "r2": r2,
-        "trained_at": datetime.now(timezone.utc)
+        "skipped": True,
+        "reason": reason,
+        "sync_counts": sync_counts,
+        "fingerprint": data_stats.get("fingerprint") if data_stats else None,
+        "drift": drift,
+        "decided_at": datetime.now(timezone.utc)
     })
+    return None
+
+
+def maybe_train_model(sync_counts: dict = None, force: bool = False,
+                      threshold: float = RETRAIN_DRIFT_THRESHOLD):
+    """
+    Retrain only when the data changed enough since the last model.
+    Returns the new version, or None when skipped (the reason is stored
+    in ml_metrics with skipped=True).
+    """
+    if force or pointer_mtime() is None:
+        return train_model()
+
+    changes = sum(
+        (sync_counts or {}).get(k, 0) for k in ("added", "updated", "removed")
+    )
+    if sync_counts is not None and changes == 0:
+        return _record_skip("sync added, updated and removed nothing", sync_counts)
+
+    data = load_training_data(TRAIN_INCLUDE_INACTIVE, TRAIN_SINCE_DAYS)
+    data_stats = data[2]
+
+    last = ml_metrics_col.find_one(sort=[("trained_at", -1)])
+    previous = (last or {}).get("data")
+    if previous and last.get("features") != FEATURE_NAMES:
+        # Served model was built on another feature set
+        return train_model(data=data)
+    if previous:
+        if previous.get("fingerprint") == data_stats["fingerprint"]:
+            return _record_skip("training rows unchanged", sync_counts, data_stats, 0.0)
+
+        drift = dataset_drift(data_stats, previous)
+        if drift < threshold:
+            return _record_skip(
+                f"drift {drift:.4f} below threshold {threshold}",
+                sync_counts, data_stats, drift
+            )
+
+    return train_model(data=data)
 
 if __name__ == "__main__":
     train_model()
\ No newline at end of file
@@ -1,10 +1,13 @@
-import asyncio
-from sync.sync_engine import run_sync
-from ml.train import train_model
+import sys
+from api.jobs import create_job, running_job_id, run_pipeline_job
 
-async def daily_job():
-    await run_sync()
-    train_model()
+def daily_job(force_retrain: bool = False):
+    # Same lock as /trigger-sync, so the two never overlap
+    job_id = create_job("cron", force_retrain)
+    if job_id is None:
+        print(f"⏭️ Pipeline job {running_job_id()} still running, skipping")
+        return
+    run_pipeline_job(job_id, force_retrain)
 
 if __name__ == "__main__":
-    asyncio.run(daily_job())
\ No newline at end of file
+    daily_job(force_retrain="--force-retrain" in sys.argv)
\ No newline at end of file
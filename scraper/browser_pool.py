@@ -0,0 +1,134 @@
+# scraper/browser_pool.py
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import psutil
+from playwright.async_api import async_playwright
+
+from scraper.scrape_inventory import CHROMIUM_ARGS
+
+# Relaunch Chromium after this many pages, or once its processes exceed this RSS
+MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "50"))
+MAX_RSS_MB = int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "700"))
+
+
+def _chromium_rss_mb() -> float:
+    """RSS of every Chromium process spawned below this one."""
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if "chrom" in child.name().lower():
+                total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium owned by the API process.
+
+    Each context() call hands out a fresh BrowserContext on the shared
+    browser, so scrapes skip the launch cost. The browser is relaunched
+    when it crashed, or once it served MAX_PAGES pages / grew past
+    MAX_RSS_MB — but only when no scrape is using it.
+    """
+
+    def __init__(self, max_pages: int = MAX_PAGES, max_rss_mb: int = MAX_RSS_MB):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self._in_use = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.pages_served = 0
+        self.launches = 0
+        self.launched_at = None
+
+    async def start(self):
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            await self._launch()
+
+    async def stop(self):
+        async with self._lock:
+            await self._idle.wait()
+            await self._close_browser()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self):
+        await self._close_browser()
+
+        start = time.perf_counter()
+        self._browser = await self._playwright.chromium.launch(
+            headless=True, args=CHROMIUM_ARGS
+        )
+        self.pages_served = 0
+        self.launches += 1
+        self.launched_at = time.time()
+        print(f"🌐 Browser pool launched Chromium in {time.perf_counter() - start:.2f}s")
+
+    async def _close_browser(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                print("⚠️ Error closing pooled browser:", e)
+            self._browser = None
+
+    def healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    def needs_recycle(self) -> bool:
+        if self.pages_served >= self.max_pages:
+            return True
+        return _chromium_rss_mb() >= self.max_rss_mb
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy(),
+            "in_use": self._in_use,
+            "pages_served": self.pages_served,
+            "launches": self.launches,
+            "chromium_rss_mb": round(_chromium_rss_mb(), 1),
+            "max_pages": self.max_pages,
+            "max_rss_mb": self.max_rss_mb
+        }
+
+    def _on_page(self, page):
+        self.pages_served += 1
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        async with self._lock:
+            if self._playwright is None:
+                raise RuntimeError("Browser pool not started")
+            if not self.healthy() or (self._in_use == 0 and self.needs_recycle()):
+                print("♻️ Recycling pooled browser...")
+                await self._launch()
+
+            context = await self._browser.new_context(**context_kwargs)
+            context.on("page", self._on_page)
+            self._in_use += 1
+            self._idle.clear()
+
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception as e:
+                print("⚠️ Error closing pooled context:", e)
+
+            self._in_use -= 1
+            if self._in_use == 0:
+                self._idle.set()
@@ -0,0 +1,271 @@
+# scraper/enrich_details.py
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from playwright.async_api import async_playwright
+
+from db.mongo import vehicles_col
+from scraper.scrape_inventory import CHROMIUM_ARGS
+
+DETAIL_CONCURRENCY = int(os.getenv("DETAIL_CONCURRENCY", "4"))
+DETAIL_RATE_PER_SEC = float(os.getenv("DETAIL_RATE_PER_SEC", "2"))
+DETAIL_TIMEOUT_MS = int(os.getenv("DETAIL_TIMEOUT_MS", "20000"))
+DETAIL_RETRIES = int(os.getenv("DETAIL_RETRIES", "3"))
+DETAIL_TTL_HOURS = float(os.getenv("DETAIL_TTL_HOURS", "168"))
+
+JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+CARFAX_URL_RE = re.compile(r'href=["\']([^"\']*carfax[^"\']*)["\']', re.IGNORECASE)
+# The Carfax badge: the link to the report, with its text / image alt
+CARFAX_BADGE_RE = re.compile(
+    r'<a\b[^>]*href=["\'][^"\']*carfax[^"\']*["\'][^>]*>.*?</a>',
+    re.IGNORECASE | re.DOTALL
+)
+ACCIDENT_FREE_RE = re.compile(r"aucun accident|sans accident|accident[- ]free|no accident", re.IGNORECASE)
+ONE_OWNER_RE = re.compile(r"un seul propri[ée]taire|one[- ]owner|1 owner", re.IGNORECASE)
+
+# schema.org Car property -> our field name
+JSON_LD_FIELDS = {
+    "driveWheelConfiguration": "drivetrain",
+    "color": "exterior_color",
+    "vehicleInteriorColor": "interior_color",
+    "vehicleTransmission": "transmission",
+    "fuelType": "fuel_type",
+    "bodyType": "body_type",
+    "vehicleEngine": "engine",
+}
+
+
+def _json_ld_vehicle(html: str):
+    for block in JSON_LD_RE.findall(html):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            continue
+
+        if isinstance(data, list):
+            candidates = data
+        elif isinstance(data, dict):
+            candidates = data.get("@graph", [data])
+        else:
+            continue
+
+        for item in candidates:
+            if not isinstance(item, dict):
+                continue
+            kind = item.get("@type")
+            kinds = kind if isinstance(kind, list) else [kind]
+            if any(k in ("Car", "Vehicle", "Product") for k in kinds):
+                return item
+    return None
+
+
+def _carfax_flag(pattern, badges, options):
+    """
+    True / False from the Carfax badge or a JSON-LD property, None when
+    neither mentions it (not the whole page: footers and FAQs say
+    "no accident" too).
+    """
+    for o in options:
+        if isinstance(o, dict) and pattern.search(str(o.get("name") or "")):
+            value = o.get("value")
+            if isinstance(value, bool):
+                return value
+            return str(value).strip().lower() not in ("false", "no", "non", "0")
+        if pattern.search(str(o.get("value") if isinstance(o, dict) else o)):
+            return True
+    if any(pattern.search(b) for b in badges):
+        return True
+    return None
+
+
+def parse_detail_html(html: str):
+    """
+    Pull detail attributes from a vehicle page.
+    Returns None when the page carries no structured vehicle data.
+    """
+    item = _json_ld_vehicle(html)
+    if item is None:
+        return None
+
+    details = {}
+    for key, field in JSON_LD_FIELDS.items():
+        value = item.get(key)
+        if isinstance(value, dict):
+            value = value.get("name") or value.get("engineType")
+        if value:
+            details[field] = str(value).strip()
+
+    options = item.get("additionalProperty") or []
+    details["options"] = sorted({
+        str(o.get("name") if isinstance(o, dict) else o).strip()
+        for o in options if o
+    })
+
+    carfax = CARFAX_URL_RE.search(html)
+    details["carfax_url"] = carfax.group(1) if carfax else None
+    badges = CARFAX_BADGE_RE.findall(html)
+    details["carfax_accident_free"] = _carfax_flag(ACCIDENT_FREE_RE, badges, options)
+    details["carfax_one_owner"] = _carfax_flag(ONE_OWNER_RE, badges, options)
+
+    return details
+
+
+class RateLimiter:
+    """Spaces request starts so the whole run stays under `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _PagePool:
+    """Up to `size` browser pages, created on first use and reused."""
+
+    def __init__(self, context, size: int):
+        self.context = context
+        self.size = size
+        self.created = 0
+        self._free = asyncio.Queue()
+
+    async def acquire(self):
+        if self._free.empty() and self.created < self.size:
+            self.created += 1
+            return await self.context.new_page()
+        return await self._free.get()
+
+    def release(self, page):
+        self._free.put_nowait(page)
+
+    async def close(self):
+        while not self._free.empty():
+            await self._free.get_nowait().close()
+
+
+def stale_vehicles(vehicles, ttl_hours: float = DETAIL_TTL_HOURS):
+    """Vehicles whose stored detail data is missing or older than the TTL."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    fresh = {
+        doc["vin"] for doc in vehicles_col.find(
+            {
+                "vin": {"$in": [v["vin"] for v in vehicles]},
+                "details_updated_at": {"$gte": cutoff}
+            },
+            {"_id": 0, "vin": 1}
+        )
+    }
+    return [v for v in vehicles if v["vin"] not in fresh]
+
+
+async def _fetch_details(context, pages: _PagePool, url: str, timeout_ms: int):
+    # Plain HTTP first: no rendering, shares the context's cookies
+    response = await context.request.get(url, timeout=timeout_ms)
+    if response.ok:
+        details = parse_detail_html(await response.text())
+        if details is not None:
+            return details
+
+    # Structured data injected client-side: render the page
+    page = await pages.acquire()
+    try:
+        await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+        details = parse_detail_html(await page.content())
+    finally:
+        pages.release(page)
+
+    # Not stored as empty details: the VIN stays stale and is retried next run
+    if not details:
+        raise ValueError("No vehicle structured data on the detail page")
+    return details
+
+
+async def _enrich_with_context(context, vehicles, concurrency, rate, timeout_ms, retries):
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    pages = _PagePool(context, concurrency)
+    stats = {"fetched": 0, "failed": 0}
+
+    async def enrich_one(vehicle):
+        async with semaphore:
+            for attempt in range(retries):
+                await limiter.wait()
+                try:
+                    details = await asyncio.wait_for(
+                        _fetch_details(context, pages, vehicle["listing_url"], timeout_ms),
+                        timeout=timeout_ms / 1000 * 2
+                    )
+                except Exception as e:
+                    if attempt == retries - 1:
+                        print(f"⚠️ Detail fetch failed for {vehicle['vin']}:", e)
+                        stats["failed"] += 1
+                        return
+                    await asyncio.sleep(2 ** attempt + random.random())
+                    continue
+
+                vehicle["details"] = details
+                vehicle["details_updated_at"] = datetime.now(timezone.utc)
+                stats["fetched"] += 1
+                return
+
+    try:
+        await asyncio.gather(*(enrich_one(v) for v in vehicles))
+    finally:
+        await pages.close()
+
+    return stats
+
+
+async def enrich_vehicles(
+    vehicles,
+    context=None,
+    concurrency: int = DETAIL_CONCURRENCY,
+    rate: float = DETAIL_RATE_PER_SEC,
+    timeout_ms: int = DETAIL_TIMEOUT_MS,
+    retries: int = DETAIL_RETRIES,
+    ttl_hours: float = DETAIL_TTL_HOURS
+):
+    """
+    Add `details` / `details_updated_at` to scraped vehicles in place.
+    Only VINs without detail data newer than `ttl_hours` are fetched.
+    """
+    start = time.perf_counter()
+    todo = await asyncio.to_thread(stale_vehicles, vehicles, ttl_hours)
+    print(f"🔎 Enriching {len(todo)} vehicles ({len(vehicles) - len(todo)} fresh)")
+
+    stats = {"fetched": 0, "failed": 0}
+    if todo:
+        if context is not None:
+            stats = await _enrich_with_context(
+                context, todo, concurrency, rate, timeout_ms, retries
+            )
+        else:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+                try:
+                    stats = await _enrich_with_context(
+                        await browser.new_context(), todo,
+                        concurrency, rate, timeout_ms, retries
+                    )
+                finally:
+                    await browser.close()
+
+    stats["skipped_fresh"] = len(vehicles) - len(todo)
+    stats["enrich_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"✅ Enrichment done | Fetched: {stats['fetched']}, Failed: {stats['failed']}")
+    return stats
@@ -1,10 +1,86 @@
 import asyncio
-from playwright.async_api import async_playwright
+import base64
+import json
+import time
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from datetime import datetime, timezone
 import re
 from urllib.parse import urlparse, parse_qs
 
 URL = "https://www.audiwestisland.com/fr/inventaire/occasion/"
+BASE_URL = "https://www.audiwestisland.com"
+
+CARD_SELECTOR = "div.T3Card-styles__CardContainer-sc-a6ff5dc7-1"
+LINK_SELECTOR = "a[href*='vehicleId']"
+TITLE_SELECTOR = "div[data-testid='model-name']"
+TRIM_SELECTOR = "div[data-testid='trim-name']"
+MILEAGE_SELECTOR = "div[data-testid='model-mileage']"
+PRICE_SELECTOR = "div.PriceBreakdown-styles__Total-sc-2a8ad1a6-6"
+LOAD_MORE_SELECTOR = "section[class*='LoadMore'] button"
+
+# Upper bound on how long one Load More click may take to add cards
+PAGE_GROWTH_TIMEOUT_MS = 10000
+NETWORK_IDLE_TIMEOUT_MS = 3000
+
+CARD_COUNT_GREW_JS = "([sel, n]) => document.querySelectorAll(sel).length > n"
+
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-device-discovery-notifications",
+    "--single-process"
+]
+
+# XHR/fetch responses whose URL matches this are treated as inventory feed pages
+FEED_URL_PATTERN = re.compile(r"inventor|vehicle|search|listing", re.IGNORECASE)
+
+# Candidate keys per field, first match wins (feeds differ between providers)
+FEED_KEYS = {
+    "vin": ("vin", "VIN", "vehicleId", "vehicle_id"),
+    "title": ("title", "name", "description"),
+    "trim": ("trim", "trimName", "trim_name"),
+    "year": ("year", "modelYear", "model_year"),
+    "make": ("make", "makeName"),
+    "model": ("model", "modelName", "model_name"),
+    "mileage": ("mileage", "odometer", "kilometers", "km"),
+    "price": ("price", "salePrice", "sellingPrice", "displayPrice", "internetPrice"),
+    "url": ("url", "detailUrl", "vdpUrl", "link", "href"),
+}
+
+# Runs inside the browser: one round trip returns the raw fields of every card
+CARD_EXTRACT_JS = """
+(cards, sel) => cards.map(card => {
+    const text = s => {
+        const el = card.querySelector(s);
+        return el ? el.innerText : null;
+    };
+    const link = card.querySelector(sel.link);
+    return {
+        href: link ? link.getAttribute("href") : null,
+        title: text(sel.title),
+        trim: text(sel.trim),
+        mileage: text(sel.mileage),
+        price: text(sel.price)
+    };
+})
+"""
+
+
+# Runs inside the browser: the link of every card, to know which VINs are listed
+CARD_HREFS_JS = """
+(cards, sel) => cards.map(card => {
+    const link = card.querySelector(sel);
+    return link ? link.getAttribute("href") : null;
+})
+"""
 
 
 def extract_vin(url: str):
@@ -13,149 +89,426 @@ def extract_vin(url: str):
     return qs.get("vehicleId", [None])[0]
 
 
-async def scrape_inventory():
-    vehicles = []
+def parse_card(raw: dict, now: datetime):
+    """
+    Build a vehicle dict from the raw text fields of one card.
+    Returns None when the card has no usable link / VIN.
+    """
+    href = raw.get("href")
+    if not href:
+        return None
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-             args=[
-        "--no-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-gpu",
-        "--disable-software-rasterizer",
-        "--disable-extensions",
-        "--disable-background-networking",
-        "--disable-sync",
-        "--disable-translate",
-        "--disable-background-timer-throttling",
-        "--disable-renderer-backgrounding",
-        "--disable-device-discovery-notifications",
-        "--single-process"
-    ]
-        )
+    full_url = href if href.startswith("http") else BASE_URL + href
 
-        page = await browser.new_page()
+    vin = extract_vin(full_url)
+    if not vin:
+        return None
 
-        print("🔄 Loading inventory page...")
-        
-        await page.route("**/*", lambda route: (
-        route.abort()
-        if route.request.resource_type in ["image", "stylesheet", "font", "media"]
-        else route.continue_()
+    title = raw["title"]
+    trim = raw["trim"]
+
+    mileage = int(
+        re.sub(r"[^\d]", "", raw["mileage"])
+    )
+
+    price = int(float(
+        re.sub(r"[^\d.]", "", raw["price"])
     ))
-        await page.goto(URL, timeout=60000)
 
-        await page.wait_for_selector(
-            "div[data-testid='model-name']",
-            timeout=60000
+    year_match = re.search(r"(20\d{2})", title)
+    year = int(year_match.group(1)) if year_match else None
+
+    return {
+        "vin": vin,
+        "title": title.strip(),
+        "trim": trim.strip(),
+        "year": year,
+        "price": price,
+        "mileage_km": mileage,
+        "listing_url": full_url,
+        "website_url": BASE_URL,
+        "status": "active",
+        "date_scraped": now,
+        "last_seen": now
+    }
+
+
+async def extract_cards(page):
+    """Batch mode: pull every card's raw fields in a single evaluate call."""
+    return await page.locator(CARD_SELECTOR).evaluate_all(
+        CARD_EXTRACT_JS,
+        {
+            "link": LINK_SELECTOR,
+            "title": TITLE_SELECTOR,
+            "trim": TRIM_SELECTOR,
+            "mileage": MILEAGE_SELECTOR,
+            "price": PRICE_SELECTOR
+        }
+    )
+
+
+async def listed_vins(page):
+    """VINs of the cards on the page, in order (one evaluate call)."""
+    hrefs = await page.locator(CARD_SELECTOR).evaluate_all(CARD_HREFS_JS, LINK_SELECTOR)
+    vins = (
+        extract_vin(href if href.startswith("http") else BASE_URL + href)
+        for href in hrefs if href
+    )
+    return list(dict.fromkeys(vin for vin in vins if vin))
+
+
+async def extract_cards_per_card(page):
+    """Legacy mode: one awaited Playwright call per field, per card."""
+    raw_cards = []
+
+    for card in await page.locator(CARD_SELECTOR).all():
+        try:
+            href = await card.locator(LINK_SELECTOR).first.get_attribute("href")
+            if not href:
+                continue
+
+            raw_cards.append({
+                "href": href,
+                "title": await card.locator(TITLE_SELECTOR).inner_text(),
+                "trim": await card.locator(TRIM_SELECTOR).inner_text(),
+                "mileage": await card.locator(MILEAGE_SELECTOR).inner_text(),
+                "price": await card.locator(PRICE_SELECTOR).inner_text()
+            })
+        except Exception as e:
+            print("⚠️ Failed to read a card:", e)
+            continue
+
+    return raw_cards
+
+
+def _first(item: dict, field: str):
+    for key in FEED_KEYS[field]:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _to_int(value):
+    if isinstance(value, dict):
+        value = value.get("value", value.get("amount"))
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        digits = re.sub(r"[^\d.]", "", value.replace(",", ""))
+        return int(float(digits)) if digits else None
+    return None
+
+
+def _feed_items(payload, depth: int = 0):
+    """Yield every dict in the payload that carries a VIN-like key."""
+    if depth > 6:
+        return
+    if isinstance(payload, list):
+        for entry in payload:
+            yield from _feed_items(entry, depth + 1)
+    elif isinstance(payload, dict):
+        if _first(payload, "vin") and (_first(payload, "price") is not None):
+            yield payload
+            return
+        for value in payload.values():
+            if isinstance(value, (list, dict)):
+                yield from _feed_items(value, depth + 1)
+
+
+def parse_feed_item(item: dict, now: datetime):
+    """Build the same vehicle dict as parse_card, from one feed record."""
+    vin = str(_first(item, "vin") or "").strip()
+    price = _to_int(_first(item, "price"))
+    if not vin or price is None:
+        return None
+
+    year = _to_int(_first(item, "year"))
+    title = _first(item, "title")
+    if not title:
+        parts = [str(year) if year else None, _first(item, "make"), _first(item, "model")]
+        title = " ".join(str(x) for x in parts if x)
+
+    if year is None:
+        year_match = re.search(r"(20\d{2})", title)
+        year = int(year_match.group(1)) if year_match else None
+
+    url = _first(item, "url")
+    if url:
+        full_url = url if url.startswith("http") else BASE_URL + url
+    else:
+        full_url = f"{URL}?vehicleId={vin}"
+
+    return {
+        "vin": vin,
+        "title": str(title).strip(),
+        "trim": str(_first(item, "trim") or "").strip(),
+        "year": year,
+        "price": price,
+        "mileage_km": _to_int(_first(item, "mileage")),
+        "listing_url": full_url,
+        "website_url": BASE_URL,
+        "status": "active",
+        "date_scraped": now,
+        "last_seen": now
+    }
+
+
+def vehicles_from_payloads(payloads, now: datetime):
+    vehicles = {}
+
+    for payload in payloads:
+        for item in _feed_items(payload):
+            try:
+                vehicle = parse_feed_item(item, now)
+            except Exception as e:
+                print("⚠️ Failed to parse a feed record:", e)
+                continue
+
+            if vehicle:
+                vehicles[vehicle["vin"]] = vehicle
+
+    return list(vehicles.values())
+
+
+def select_feed_vehicles(feed_vehicles, listed_vins):
+    """
+    The feed records for exactly the VINs the page lists, in page order,
+    or None when the feed misses any of them. Extra VINs (e.g. a
+    "similar vehicles" response matching FEED_URL_PATTERN) are dropped.
+    """
+    by_vin = {v["vin"]: v for v in feed_vehicles}
+    if not listed_vins or any(vin not in by_vin for vin in listed_vins):
+        return None
+    return [by_vin[vin] for vin in listed_vins]
+
+
+def load_har_payloads(path: str, pattern=FEED_URL_PATTERN):
+    """Read recorded feed payloads from a HAR file (for offline replay)."""
+    with open(path, encoding="utf-8") as f:
+        har = json.load(f)
+
+    payloads = []
+
+    for entry in har.get("log", {}).get("entries", []):
+        if not pattern.search(entry["request"]["url"]):
+            continue
+
+        content = entry.get("response", {}).get("content", {})
+        text = content.get("text")
+        if not text or "json" not in content.get("mimeType", ""):
+            continue
+        if content.get("encoding") == "base64":
+            text = base64.b64decode(text).decode("utf-8")
+
+        try:
+            payloads.append(json.loads(text))
+        except ValueError:
+            continue
+
+    return payloads
+
+
+class InventoryFeedCapture:
+    """
+    Records inventory JSON responses the page downloads on its own.
+    Attach before page.goto(); read with drain() once the page settled.
+    """
+
+    def __init__(self, page, pattern=FEED_URL_PATTERN):
+        self.pattern = pattern
+        self.payloads = []
+        self._pending = []
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if not self.pattern.search(response.url):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        self._pending.append(asyncio.ensure_future(self._record(response)))
+
+    async def _record(self, response):
+        try:
+            self.payloads.append(await response.json())
+        except Exception as e:
+            print("⚠️ Could not read feed response:", e)
+
+    async def drain(self):
+        while self._pending:
+            pending, self._pending = self._pending, []
+            await asyncio.gather(*pending)
+        return self.payloads
+
+
+async def _wait_for_more_cards(page, count: int, timeout_ms: int):
+    """Wait until more than `count` cards exist, or the network goes quiet."""
+    try:
+        await page.wait_for_function(
+            CARD_COUNT_GREW_JS,
+            arg=[CARD_SELECTOR, count],
+            timeout=timeout_ms
         )
+    except PlaywrightTimeoutError:
+        try:
+            await page.wait_for_load_state(
+                "networkidle", timeout=NETWORK_IDLE_TIMEOUT_MS
+            )
+        except PlaywrightTimeoutError:
+            pass
 
-        # ---------------------------------
-        # HANDLE LOAD MORE BUTTON (SAFE)
-        # ---------------------------------
+    return await page.locator(CARD_SELECTOR).count()
 
-        previous_count = 0
 
-        while True:
-            cards = await page.locator(
-                "div.T3Card-styles__CardContainer-sc-a6ff5dc7-1"
-            ).all()
+async def load_all_cards(page, timeout_ms: int = PAGE_GROWTH_TIMEOUT_MS):
+    """
+    Click Load More until the card count stops growing.
+    Returns (final card count, per-page timing stats).
+    """
+    cards = page.locator(CARD_SELECTOR)
+    load_more_btn = page.locator(LOAD_MORE_SELECTOR).first
 
-            current_count = len(cards)
+    count = await cards.count()
+    page_stats = []
+    print(f"📦 Currently loaded: {count}")
 
-            if current_count == previous_count:
-                break
+    while True:
+        if await page.locator(LOAD_MORE_SELECTOR).count() == 0:
+            break
+        if not await load_more_btn.is_visible() or await load_more_btn.is_disabled():
+            break
 
-            previous_count = current_count
-            print(f"📦 Currently loaded: {current_count}")
+        start = time.perf_counter()
+        await load_more_btn.click()
+        new_count = await _wait_for_more_cards(page, count, timeout_ms)
+        elapsed_ms = (time.perf_counter() - start) * 1000
 
-            load_more_btn = page.locator(
-                "section[class*='LoadMore'] button"
-            )
+        page_stats.append({
+            "page": len(page_stats) + 1,
+            "cards_added": new_count - count,
+            "total_cards": new_count,
+            "wait_ms": round(elapsed_ms, 1)
+        })
 
-            if await load_more_btn.count() == 0:
-                break
+        if new_count <= count:
+            break
 
-            print("🔘 Clicking Load More...")
-            await load_more_btn.first.click()
-            await page.wait_for_timeout(1200)
+        count = new_count
+        print(f"📦 Currently loaded: {count} (+{page_stats[-1]['cards_added']} in {elapsed_ms:.0f} ms)")
 
-        print(f"🔍 Final vehicle count detected: {previous_count}")
+    print(f"🔍 Final vehicle count detected: {count}")
+    return count, page_stats
 
-        # ---------------------------------
-        # SCRAPE VEHICLES
-        # ---------------------------------
 
-        cards = await page.locator(
-            "div.T3Card-styles__CardContainer-sc-a6ff5dc7-1"
-        ).all()
+def parse_cards(raw_cards, now: datetime):
+    vehicles = []
 
-        now = datetime.now(timezone.utc)
+    for raw in raw_cards:
+        try:
+            vehicle = parse_card(raw, now)
+        except Exception as e:
+            print("⚠️ Failed to parse a card:", e)
+            continue
 
-        for card in cards:
-            try:
-                link_el = card.locator("a[href*='vehicleId']").first
-                href = await link_el.get_attribute("href")
-                if not href:
-                    continue
-
-                full_url = (
-                    href if href.startswith("http")
-                    else "https://www.audiwestisland.com" + href
-                )
-
-                vin = extract_vin(full_url)
-                if not vin:
-                    continue
-
-                title = await card.locator(
-                    "div[data-testid='model-name']"
-                ).inner_text()
-
-                trim = await card.locator(
-                    "div[data-testid='trim-name']"
-                ).inner_text()
-
-                mileage_text = await card.locator(
-                    "div[data-testid='model-mileage']"
-                ).inner_text()
-
-                mileage = int(
-                    re.sub(r"[^\d]", "", mileage_text)
-                )
-
-                price_text = await card.locator(
-                    "div.PriceBreakdown-styles__Total-sc-2a8ad1a6-6"
-                ).inner_text()
-
-                price = int(float(
-                    re.sub(r"[^\d.]", "", price_text)
-                ))
-
-                year_match = re.search(r"(20\d{2})", title)
-                year = int(year_match.group(1)) if year_match else None
-
-                vehicles.append({
-                    "vin": vin,
-                    "title": title.strip(),
-                    "trim": trim.strip(),
-                    "year": year,
-                    "price": price,
-                    "mileage_km": mileage,
-                    "listing_url": full_url,
-                    "website_url": "https://www.audiwestisland.com",
-                    "status": "active",
-                    "date_scraped": now,
-                    "last_seen": now
-                })
+        if vehicle:
+            vehicles.append(vehicle)
 
-            except Exception as e:
-                print("⚠️ Failed to parse a card:", e)
-                continue
+    return vehicles
+
+
+async def _scrape_page(page, batch: bool, capture: bool, url: str, stats: dict):
+    feed = InventoryFeedCapture(page) if capture else None
+
+    print("🔄 Loading inventory page...")
+
+    await page.route("**/*", lambda route: (
+        route.abort()
+        if route.request.resource_type in ["image", "stylesheet", "font", "media"]
+        else route.continue_()
+    ))
+    await page.goto(url, timeout=60000)
+
+    await page.wait_for_selector(
+        TITLE_SELECTOR,
+        timeout=60000
+    )
+
+    now = datetime.now(timezone.utc)
+    vehicles = []
+
+    # Load More until the button is gone: the page decides what is listed
+    _, stats["pages"] = await load_all_cards(page)
+
+    # ---------------------------------
+    # NETWORK CAPTURE (FEED JSON)
+    # ---------------------------------
+
+    # The feed only supplies the fields: it must hold a record for every
+    # VIN the page lists, and records for VINs not listed are ignored
+    if feed:
+        payloads = await feed.drain()
+        captured = vehicles_from_payloads(payloads, now)
+        listed = await listed_vins(page)
+        selected = select_feed_vehicles(captured, listed)
+
+        if selected:
+            vehicles = selected
+            stats["source"] = "feed"
+            print(f"📡 Captured {len(vehicles)} vehicles from inventory feed"
+                  f" ({len(captured) - len(vehicles)} unlisted records ignored)")
+        elif captured:
+            print(f"📡 Feed does not cover the {len(listed)} listed vehicles, using DOM")
+        else:
+            print("📡 No inventory feed matched, falling back to DOM")
+
+    # ---------------------------------
+    # DOM FALLBACK
+    # ---------------------------------
+
+    if not vehicles:
+        if batch:
+            raw_cards = await extract_cards(page)
+        else:
+            raw_cards = await extract_cards_per_card(page)
+
+        vehicles = parse_cards(raw_cards, now)
+        stats["source"] = "dom"
 
-        await browser.close()
+    return vehicles
+
+
+async def scrape_inventory(batch: bool = True, capture: bool = True, url: str = URL,
+                           stats: dict = None, context=None):
+    """
+    Scrape the used inventory. Pass a dict as `stats` to receive per-page
+    pagination timings and the source used (feed / dom).
+
+    `context` is an already running Playwright BrowserContext (see
+    scraper.browser_pool); without it a browser is launched for this call.
+    """
+    stats = stats if stats is not None else {}
+    stats["pages"] = []
+    started = time.perf_counter()
+
+    if context is not None:
+        page = await context.new_page()
+        try:
+            vehicles = await _scrape_page(page, batch, capture, url, stats)
+        finally:
+            await page.close()
+    else:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            page = await browser.new_page()
+            try:
+                vehicles = await _scrape_page(page, batch, capture, url, stats)
+            finally:
+                await browser.close()
 
+    stats["pagination_ms"] = round(sum(pg["wait_ms"] for pg in stats["pages"]), 1)
+    stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
     print(f"✅ Successfully scraped {len(vehicles)} vehicles")
     return vehicles
 
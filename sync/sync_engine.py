@@ -1,40 +1,43 @@
 from scraper.scrape_inventory import scrape_inventory
-from db.mongo import vehicles_col, sync_logs_col
+from scraper.enrich_details import enrich_vehicles
+from ml.features import parse_title
+from ml.precompute import refresh_predictions
+from db.mongo import vehicles_col, sync_logs_col, vehicle_history_col
+from pymongo import UpdateOne
 from datetime import datetime, timezone
 import asyncio
+import hashlib
+import json
+import os
 
-async def run_sync():
-    now = datetime.now(timezone.utc)
-
-    print("🔄 Running inventory sync...")
+# Upserts per bulk_write call (one round trip each)
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "1000"))
 
-    scraped = await scrape_inventory()
-    scraped_map = {v["vin"]: v for v in scraped}
+# Fields whose change makes a vehicle worth a full rewrite
+HASHED_FIELDS = ("price", "mileage_km", "trim", "title", "listing_url")
 
-    db_vins = set(vehicles_col.distinct("vin"))
-    scraped_vins = set(scraped_map.keys())
 
-    added = updated = removed = 0
+def normalize_price(vehicle: dict):
+    # 🔐 PRICE NORMALIZATION (CRITICAL FIX)
+    if "price" in vehicle and vehicle["price"] is not None:
+        # If price looks like cents (e.g. 3379500), fix it
+        if vehicle["price"] > 1_000_000:
+            vehicle["price"] = int(vehicle["price"] / 100)
 
-    # ✅ ADD / UPDATE VEHICLES
-    for vin, vehicle in scraped_map.items():
 
-        # 🔐 PRICE NORMALIZATION (CRITICAL FIX)
-        if "price" in vehicle and vehicle["price"] is not None:
-            # If price looks like cents (e.g. 3379500), fix it
-            if vehicle["price"] > 1_000_000:
-                vehicle["price"] = int(vehicle["price"] / 100)
+def content_hash(vehicle: dict) -> str:
+    payload = json.dumps([vehicle.get(f) for f in HASHED_FIELDS], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-        # vehicle_update = vehicle.copy()
 
-        # Always update last_seen
-        # vehicle_update["last_seen"] = now
-        # vehicle_update["status"] = "active"
+def build_upserts(scraped_map: dict, now: datetime):
+    ops = []
 
+    for vin, vehicle in scraped_map.items():
         vehicle_update = vehicle.copy()
         vehicle_update.pop("date_scraped", None)
 
-        result = vehicles_col.update_one(
+        ops.append(UpdateOne(
             {"vin": vin},
             {
                 "$set": {
@@ -44,42 +47,189 @@ async def run_sync():
                 },
                 "$setOnInsert": {
                     "date_scraped": now
+                },
+                # Features changed: the stored prediction is stale
+                "$unset": {
+                    "predicted_price": "",
+                    "model_version": ""
                 }
             },
             upsert=True
+        ))
+
+    return ops
+
+
+def history_entry(vehicle: dict, previous, now: datetime):
+    """
+    Price/mileage point for vehicle_history, or None when neither moved.
+    `previous` is the stored document (None for a new listing).
+    """
+    if previous is None:
+        event, prev_price, prev_mileage = "listed", None, None
+    else:
+        prev_price = previous.get("price")
+        prev_mileage = previous.get("mileage_km")
+        if prev_price == vehicle.get("price") and prev_mileage == vehicle.get("mileage_km"):
+            return None
+        event = "changed"
+
+    price_change = (
+        vehicle["price"] - prev_price
+        if vehicle.get("price") is not None and prev_price is not None
+        else None
+    )
+
+    return {
+        "vin": vehicle["vin"],
+        "ts": now,
+        "event": event,
+        "title": vehicle.get("title"),
+        "price": vehicle.get("price"),
+        "mileage_km": vehicle.get("mileage_km"),
+        "prev_price": prev_price,
+        "prev_mileage_km": prev_mileage,
+        "price_change": price_change,
+        "price_dropped": price_change is not None and price_change < 0
+    }
+
+
+def sync_vehicles(scraped, now: datetime, col=None, history_col=None,
+                  batch_size: int = SYNC_BATCH_SIZE):
+    """
+    Write one scrape to Mongo. Only new or changed vehicles (by content
+    hash) get a full upsert; unchanged ones share a single last_seen bump.
+    Price/mileage moves are appended to vehicle_history in the same pass.
+    Blocking (pymongo): run it off the event loop.
+    """
+    col = col if col is not None else vehicles_col
+    history_col = history_col if history_col is not None else vehicle_history_col
+    scraped_map = {v["vin"]: v for v in scraped}
+
+    for vehicle in scraped_map.values():
+        normalize_price(vehicle)
+        vehicle["content_hash"] = content_hash(vehicle)
+        # Same family the model sees; /report groups on it server-side
+        vehicle["model_family"] = parse_title(vehicle.get("title") or "")[0] or None
+
+    # One projected read: what we stored last time
+    stored = {
+        doc["vin"]: doc for doc in col.find(
+            {"vin": {"$in": list(scraped_map)}},
+            {"_id": 0, "vin": 1, "content_hash": 1, "status": 1,
+             "price": 1, "mileage_km": 1, "model_family": 1}
         )
-        if result.upserted_id:
-            added += 1
-        elif result.modified_count:
-            updated += 1
+    }
 
-    # 🚫 MARK REMOVED VEHICLES
-    removed_vins = db_vins - scraped_vins
-    if removed_vins:
-        vehicles_col.update_many(
-            {"vin": {"$in": list(removed_vins)}},
-            {
-                "$set": {
-                    "status": "inactive"
-                  
-                }
-            }
+    to_write = {}
+    unchanged = []
+    history = []
+    for vin, vehicle in scraped_map.items():
+        doc = stored.get(vin)
+        if (
+            doc is not None
+            and doc.get("content_hash") == vehicle["content_hash"]
+            and doc.get("status") == "active"
+            and "model_family" in doc  # stored before model_family existed
+            and "details" not in vehicle
+        ):
+            unchanged.append(vin)
+        else:
+            to_write[vin] = vehicle
+            entry = history_entry(vehicle, doc, now)
+            if entry:
+                history.append(entry)
+
+    added = updated = removed = 0
+
+    # ✅ ADD / UPDATE CHANGED VEHICLES
+    ops = build_upserts(to_write, now)
+    for i in range(0, len(ops), batch_size):
+        result = col.bulk_write(ops[i:i + batch_size], ordered=False)
+        added += result.upserted_count
+        updated += result.modified_count
+
+    # 📈 PRICE / MILEAGE HISTORY
+    for i in range(0, len(history), batch_size):
+        history_col.insert_many(history[i:i + batch_size], ordered=False)
+
+    # 👀 UNCHANGED: only bump last_seen
+    if unchanged:
+        col.update_many(
+            {"vin": {"$in": unchanged}},
+            {"$set": {"last_seen": now}}
         )
-        removed = len(removed_vins)
+
+    # 🚫 MARK REMOVED VEHICLES
+    result = col.update_many(
+        {"status": "active", "vin": {"$nin": list(scraped_map)}},
+        {"$set": {"status": "inactive"}}
+    )
+    removed = result.modified_count
+
+    return {
+        "added": added,
+        "updated": updated,
+        "unchanged": len(unchanged),
+        "removed": removed,
+        "history_points": len(history),
+        # Everything not scraped was just deactivated
+        "total_active": len(scraped_map)
+    }
+
+
+async def run_sync(browser_pool=None, enrich: bool = True):
+    now = datetime.now(timezone.utc)
+
+    print("🔄 Running inventory sync...")
+
+    scrape_stats = {}
+    enrich_stats = {}
+    if browser_pool is not None:
+        async with browser_pool.context() as context:
+            scraped = await scrape_inventory(stats=scrape_stats, context=context)
+            if enrich:
+                enrich_stats = await enrich_vehicles(scraped, context=context)
+    else:
+        scraped = await scrape_inventory(stats=scrape_stats)
+        if enrich:
+            enrich_stats = await enrich_vehicles(scraped)
+
+    counts = await asyncio.to_thread(sync_vehicles, scraped, now)
+    counts["scrape_ms"] = scrape_stats.get("total_ms")
+    counts["enrich_ms"] = enrich_stats.get("enrich_ms")
 
     # 🧾 LOG SYNC
-    sync_logs_col.insert_one({
-    "timestamp": now,
-    "new_count": added,
-    "updated_count": updated,
-    "removed_count": removed,
-    "total_active": vehicles_col.count_documents({"status": "active"})
-})
+    await asyncio.to_thread(sync_logs_col.insert_one, {
+        "timestamp": now,
+        "new_count": counts["added"],
+        "updated_count": counts["updated"],
+        "unchanged_count": counts["unchanged"],
+        "history_points": counts["history_points"],
+        "removed_count": counts["removed"],
+        "total_active": counts["total_active"],
+        "scrape_source": scrape_stats.get("source"),
+        "scrape_ms": scrape_stats.get("total_ms"),
+        "pagination_ms": scrape_stats.get("pagination_ms"),
+        "pages_loaded": len(scrape_stats.get("pages", [])),
+        "details_fetched": enrich_stats.get("fetched", 0),
+        "details_failed": enrich_stats.get("failed", 0),
+        "enrich_ms": enrich_stats.get("enrich_ms")
+    })
+
+    # 🧮 PREDICTIONS FOR NEW / CHANGED VEHICLES
+    try:
+        await asyncio.to_thread(refresh_predictions)
+    except FileNotFoundError:
+        print("⚠️ No model yet, skipping stored predictions")
 
     print(
-        f"✅ Sync complete | Added: {added}, Updated: {updated}, Removed: {removed}"
+        f"✅ Sync complete | Added: {counts['added']}, "
+        f"Updated: {counts['updated']}, Unchanged: {counts['unchanged']}, "
+        f"Removed: {counts['removed']}"
     )
+    return counts
 
 
 if __name__ == "__main__":
-    asyncio.run(run_sync())
\ No newline at end of file
+    asyncio.run(run_sync())